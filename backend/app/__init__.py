@@ -1 +1,10 @@
-# This file makes the app directory a Python package 
\ No newline at end of file
+# This file makes the app directory a Python package
+import time
+
+# Start of application imports, reported as app_import_seconds
+IMPORT_STARTED = time.perf_counter()
+
+from dotenv import load_dotenv
+
+# Once, before any app module reads its settings from the environment
+load_dotenv()
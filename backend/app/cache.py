@@ -0,0 +1,199 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import orjson
+from .redis_client import redis_client
+
+
+class TTLValue:
+    """Single cached value that expires after `ttl` seconds (0 disables caching).
+
+    Like CacheBackend, set() drops a value computed from before the latest
+    invalidate() when given the generation() taken before computing it.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Any = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self) -> Optional[Any]:
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+        return None
+
+    def set(self, value: Any, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self._generation:
+            return
+        if self.ttl > 0:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._value = None
+        self._expires_at = 0.0
+
+
+class CacheBackend:
+    """Async key/value cache with hit/miss/eviction counters.
+
+    A read-through caller takes `generation(key)` before loading a value and
+    passes it to `set`, which drops the value if `delete(key)` ran in between:
+    the load may have returned the document as it was before that write.
+    """
+
+    name = "none"
+    # Per-key generations remembered; older ones collapse into a shared floor
+    GENERATIONS_KEPT = 10000
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+        self._counter = 0
+        self._floor = 0
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+
+    def generation(self, key: str) -> int:
+        # A forgotten key reports the floor, which is at least its last generation,
+        # so forgetting can only make set() more cautious
+        return self._generations.get(key, self._floor)
+
+    def _invalidate(self, key: str) -> None:
+        self.invalidations += 1
+        self._counter += 1
+        self._generations[key] = self._counter
+        self._generations.move_to_end(key)
+        while len(self._generations) > self.GENERATIONS_KEPT:
+            _, self._floor = self._generations.popitem(last=False)
+
+    def _is_stale(self, key: str, generation: Optional[int]) -> bool:
+        if generation is not None and generation != self.generation(key):
+            self.stale_sets += 1
+            return True
+        return False
+
+    async def get(self, key: str) -> Optional[dict]:
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict, generation: Optional[int] = None) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        self._invalidate(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_sets": self.stale_sets,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU bounded by `maxsize` entries, each living at most `ttl` seconds."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(value)
+
+    async def set(self, key: str, value: dict, generation: Optional[int] = None) -> None:
+        if self._is_stale(key, generation):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._invalidate(key)
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl})
+        return stats
+
+
+class RedisCache(CacheBackend):
+    """Shared cache on any client exposing redis.asyncio's get/set(ex=, nx=).
+
+    Expiry and eviction happen inside Redis, so `evictions` stays at 0 here.
+    Generations only see this worker's deletes, so a delete also leaves a
+    short-lived tombstone that set(nx=True) won't overwrite: a read that
+    started before another worker's write can't put the old document back.
+    """
+
+    name = "redis"
+    TOMBSTONE = b""
+
+    def __init__(self, client: Any, ttl: float = 60, prefix: str = "task:", tombstone_ttl: float = 10):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.tombstone_ttl = tombstone_ttl
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None or raw == self.TOMBSTONE:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return orjson.loads(raw)
+
+    async def set(self, key: str, value: dict, generation: Optional[int] = None) -> None:
+        if self._is_stale(key, generation):
+            return
+        await self.client.set(self.prefix + key, orjson.dumps(value), ex=max(1, int(self.ttl)), nx=True)
+
+    async def delete(self, key: str) -> None:
+        self._invalidate(key)
+        await self.client.set(self.prefix + key, self.TOMBSTONE, ex=max(1, int(self.tombstone_ttl)))
+
+
+def build_task_cache() -> CacheBackend:
+    backend = os.getenv("TASK_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("TASK_CACHE_TTL", "60"))
+    if backend == "redis":
+        return RedisCache(redis_client(), ttl=ttl)
+    if backend == "memory":
+        return LRUCache(maxsize=int(os.getenv("TASK_CACHE_SIZE", "10000")), ttl=ttl)
+    return CacheBackend()
+
+
+task_cache = build_task_cache()
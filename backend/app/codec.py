@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+import orjson
+from fastapi.responses import Response
+
+# Single place that maps stored task documents to API output. The fields below
+# are exactly the `Task` response schema, so encoded tasks can be written to the
+# wire without FastAPI re-validating them against the response_model.
+TASK_FIELDS = ("title", "description", "status", "priority", "due_date", "overdue", "created_at", "updated_at")
+
+# Mongo-side projection: only fetch what the API returns
+TASK_PROJECTION = {field: 1 for field in TASK_FIELDS}
+
+# Same defaults the Task schema applies to missing fields
+TASK_DEFAULTS = {"description": "", "overdue": False}
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    # "title,status" -> ("title", "status"), in TASK_FIELDS order; _id is always returned
+    if not fields:
+        return TASK_FIELDS
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    requested.discard("_id")
+    unknown = requested.difference(TASK_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(field for field in TASK_FIELDS if field in requested)
+
+
+def task_projection(fields: Sequence[str] = TASK_FIELDS) -> dict:
+    if fields is TASK_FIELDS:
+        return TASK_PROJECTION
+    return {"_id": 1, **{field: 1 for field in fields}}
+
+
+def encode_task(doc: dict, fields: Sequence[str] = TASK_FIELDS) -> dict:
+    task = {"_id": str(doc["_id"])}
+    for field in fields:
+        value = doc.get(field, TASK_DEFAULTS.get(field))
+        if value.__class__ is datetime:
+            value = value.isoformat()
+        task[field] = value
+    return task
+
+
+def _default(value: Any) -> Any:
+    # ObjectId and anything else orjson doesn't know natively
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class TaskJSONResponse(Response):
+    """orjson-encoded JSON response. Returning it from a route skips response_model validation."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
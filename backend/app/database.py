@@ -1,28 +1,202 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import monitoring
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+import asyncio
+from contextlib import asynccontextmanager
 import os
-from dotenv import load_dotenv
+import threading
 import logging
+from typing import Any, AsyncIterator, Dict, Optional
+from .metrics import Gauge
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Required by connect(); the memory storage backend runs without them
+MONGODB_URL = os.getenv("MONGODB_URL")
+DATABASE_NAME = os.getenv("DATABASE_NAME")
+COLLECTION_NAME = os.getenv("COLLECTION_NAME")
 
-load_dotenv()
+# Connection pool tuning. Size MONGODB_MAX_POOL_SIZE per uvicorn worker:
+# total connections to the cluster = workers * max pool size.
+MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "10"))
+MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "30000"))
+WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+# zstd/snappy need the optional zstandard/python-snappy packages; zlib is always available
+COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zlib")
+# Read preference for list/stats/export queries, which tolerate replication lag
+READ_PREFERENCE = os.getenv("MONGODB_READ_PREFERENCE", "secondaryPreferred")
+WARM_CONNECTIONS = int(os.getenv("MONGODB_WARM_CONNECTIONS", str(MIN_POOL_SIZE)))
 
-MONGODB_URL = os.environ["MONGODB_URL"]
-DATABASE_NAME = os.environ["DATABASE_NAME"]
-COLLECTION_NAME = os.environ["COLLECTION_NAME"]
+mongo_pool_connections = Gauge("mongo_pool_connections", "MongoDB connection pool connections", ("state",))
 
-logger.info(f"Connecting to MongoDB at: {MONGODB_URL}")
-logger.info(f"Database: {DATABASE_NAME}")
-logger.info(f"Collection: {COLLECTION_NAME}")
 
-try:
-    client = AsyncIOMotorClient(MONGODB_URL)
-    db = client[DATABASE_NAME]
-    tasks_collection = db[COLLECTION_NAME]
-    logger.info("Database connection established successfully")
-except Exception as e:
-    logger.error(f"Failed to connect to database: {e}")
-    raise 
\ No newline at end of file
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Tracks pool utilization from CMAP events (called from driver threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.wait_queue_timeouts = 0
+        self._publish()
+
+    def _publish(self) -> None:
+        mongo_pool_connections.set(self.open, "open")
+        mongo_pool_connections.set(self.checked_out, "checked_out")
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self._publish()
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+            self._publish()
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self._publish()
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+            self._publish()
+
+    def connection_check_out_failed(self, event):
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+            with self._lock:
+                self.wait_queue_timeouts += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "max_pool_size": MAX_POOL_SIZE,
+            "min_pool_size": MIN_POOL_SIZE,
+            "utilization": self.checked_out / MAX_POOL_SIZE if MAX_POOL_SIZE else 0.0,
+            "wait_queue_timeouts": self.wait_queue_timeouts,
+        }
+
+
+pool_stats = PoolStats()
+
+# Populated by connect() from the application lifespan
+client: Optional[AsyncIOMotorClient] = None
+db: Optional[AsyncIOMotorDatabase] = None
+tasks_collection: Optional[AsyncIOMotorCollection] = None
+# Same collection, reading with READ_PREFERENCE; for lag-tolerant queries
+tasks_read_collection: Optional[AsyncIOMotorCollection] = None
+# Small bookkeeping documents about the tasks collection (e.g. its change counter)
+meta_collection: Optional[AsyncIOMotorCollection] = None
+meta_read_collection: Optional[AsyncIOMotorCollection] = None
+# Tombstones for deleted tasks, expired by a TTL index (see app/indexes.py)
+deletions_collection: Optional[AsyncIOMotorCollection] = None
+
+
+def redact_url(url: str) -> str:
+    # Scheme and hosts only; credentials and options stay out of the logs
+    scheme, _, rest = url.partition("://")
+    hosts = rest.rsplit("@", 1)[-1].split("/", 1)[0].split("?", 1)[0]
+    return f"{scheme}://{hosts}"
+
+
+async def connect() -> None:
+    global client, db, tasks_collection, tasks_read_collection, meta_collection, meta_read_collection, deletions_collection
+    if client is not None:
+        return
+    missing = [name for name, value in (
+        ("MONGODB_URL", MONGODB_URL), ("DATABASE_NAME", DATABASE_NAME), ("COLLECTION_NAME", COLLECTION_NAME)
+    ) if not value]
+    if missing:
+        raise RuntimeError(f"Missing required environment variables: {', '.join(missing)}")
+
+    logger.info(f"Connecting to MongoDB at: {redact_url(MONGODB_URL)}")
+    logger.info(f"Database: {DATABASE_NAME}")
+    logger.info(f"Collection: {COLLECTION_NAME}")
+
+    try:
+        client = AsyncIOMotorClient(
+            MONGODB_URL,
+            maxPoolSize=MAX_POOL_SIZE,
+            minPoolSize=MIN_POOL_SIZE,
+            maxIdleTimeMS=MAX_IDLE_TIME_MS,
+            connectTimeoutMS=CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=WAIT_QUEUE_TIMEOUT_MS,
+            compressors=COMPRESSORS,
+            event_listeners=[pool_stats],
+        )
+        db = client[DATABASE_NAME]
+        tasks_collection = db[COLLECTION_NAME]
+        meta_collection = db[f"{COLLECTION_NAME}_meta"]
+        deletions_collection = db[f"{COLLECTION_NAME}_deletions"]
+        if READ_PREFERENCE == "primary":
+            tasks_read_collection, meta_read_collection = tasks_collection, meta_collection
+        else:
+            read_preference = make_read_preference(read_pref_mode_from_name(READ_PREFERENCE), None)
+            tasks_read_collection = tasks_collection.with_options(read_preference=read_preference)
+            meta_read_collection = meta_collection.with_options(read_preference=read_preference)
+        logger.info("Database connection established successfully")
+    except Exception as e:
+        logger.error(f"Failed to connect to database: {e}")
+        raise
+
+    await warm_up()
+
+
+async def warm_up() -> None:
+    # Concurrent pings force the driver to open WARM_CONNECTIONS sockets now,
+    # instead of paying connection setup on the first requests
+    if WARM_CONNECTIONS <= 0:
+        return
+    try:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(WARM_CONNECTIONS)))
+        logger.info(f"Warmed MongoDB pool with {pool_stats.open} connections")
+    except Exception as e:
+        # The driver retries on demand; a cold pool only costs latency
+        logger.error(f"Failed to warm MongoDB pool: {e}")
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[Any]:
+    # Reads that must agree with each other (the list ETag counter and the
+    # list itself) share a causally consistent session, so the second read
+    # can't land on a secondary that is behind the first. Primary reads
+    # are already consistent and skip the session.
+    if READ_PREFERENCE == "primary":
+        yield None
+        return
+    async with await client.start_session(causal_consistency=True) as session:
+        yield session
+
+
+def close() -> None:
+    global client, db, tasks_collection, tasks_read_collection, meta_collection, meta_read_collection, deletions_collection
+    if client is not None:
+        client.close()
+    client = db = tasks_collection = tasks_read_collection = meta_collection = meta_read_collection = deletions_collection = None
@@ -0,0 +1,50 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def task_etag(task: dict) -> str:
+    # Strong validator: milliseconds of the task's updated_at, the same
+    # precision MongoDB stores, so it can be turned back into a query filter
+    updated_at = _to_naive_utc(datetime.fromisoformat(task["updated_at"]))
+    return f'"{(updated_at - EPOCH) // timedelta(milliseconds=1)}"'
+
+
+def etag_updated_at(etag: str) -> Optional[datetime]:
+    value = etag.strip()
+    if value.startswith("W/"):
+        return None
+    try:
+        return EPOCH + timedelta(milliseconds=int(value.strip('"')))
+    except (ValueError, OverflowError):
+        # Not one of ours, so it can't match any stored version
+        return None
+
+
+def list_etag(version: int, query_string: str) -> str:
+    # Weak validator: the collection change counter plus the request's filters
+    digest = hashlib.sha1(query_string.encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def parse_etags(header: Optional[str]) -> List[str]:
+    if not header:
+        return []
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """True when If-None-Match matches `etag` (weak comparison), i.e. the client copy is fresh."""
+    tags = parse_etags(header)
+    if "*" in tags:
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == bare for tag in tags)
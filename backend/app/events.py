@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+from itertools import count
+from typing import Dict, List, Optional, Set
+from . import storage
+from .codec import encode_task
+
+logger = logging.getLogger(__name__)
+
+# auto: use MongoDB change streams when the deployment supports them (replica
+# set / sharded cluster), otherwise fall back to publishing TaskModel writes
+# in-process. The in-process source only sees writes made by this worker.
+EVENTS_SOURCE = os.getenv("TASK_EVENTS_SOURCE", "auto").lower()
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "256"))
+WATCH_OPTIONS = {"full_document": "updateLookup"}
+# Only asked for when the collection has changeStreamPreAndPostImages on (MongoDB
+# 6.0+, enabled by app.indexes); elsewhere the option makes watch() fail
+PRE_IMAGE_OPTIONS = {"full_document_before_change": "whenAvailable"}
+
+_CHANGE_TYPES = {"insert": "create", "update": "update", "replace": "update", "delete": "delete"}
+
+
+def filter_state(task: dict) -> Dict[str, Optional[str]]:
+    # The fields subscriptions filter on; events carry them for the task before an update
+    return {"status": task.get("status"), "priority": task.get("priority")}
+
+
+class Subscription:
+    def __init__(self, status: Optional[str] = None, priority: Optional[str] = None, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.status = status
+        self.priority = priority
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        # Set when events had to be dropped; the client should refetch
+        self.overflowed = False
+
+    def matches(self, state: dict) -> bool:
+        if self.status and state.get("status") != self.status:
+            return False
+        if self.priority and state.get("priority") != self.priority:
+            return False
+        return True
+
+    def view(self, event: dict) -> Optional[dict]:
+        """The event as this subscriber should see it, or None if it is outside its filter."""
+        task = event.get("task")
+        previous = event.get("previous")
+        if task is not None and self.matches(task):
+            return event
+        if event["type"] == "create":
+            return None
+        if previous is not None and not self.matches(previous):
+            return None
+        if task is None:
+            # Deletes and partial updates carry no new state to filter on
+            return event
+        # The task was in this filter, or may have been when the old state is unknown
+        return {**event, "type": "leave", "task": None}
+
+    def offer(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: drop everything queued and tell it to resync,
+            # rather than buffering without bound or blocking publishers
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = True
+
+
+class EventBroker:
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.source = "local"
+        self._sequence = count(1)
+        self._watcher: Optional[asyncio.Task] = None
+        self._watch_options = WATCH_OPTIONS
+
+    def subscribe(self, status: Optional[str] = None, priority: Optional[str] = None) -> Subscription:
+        subscription = Subscription(status, priority)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def publish(self, event: dict) -> None:
+        event["seq"] = next(self._sequence)
+        for subscription in self.subscribers:
+            view = subscription.view(event)
+            if view is not None:
+                subscription.offer(view)
+
+    def publish_local(self, events: List[dict]) -> None:
+        # When change streams are active they already deliver our own writes
+        if self.source != "local" or not self.subscribers:
+            return
+        for event in events:
+            self.publish(dict(event))
+
+    async def start(self) -> None:
+        if EVENTS_SOURCE == "local":
+            return
+        try:
+            pre_images = await storage.store.pre_images_enabled()
+            no_pre_images = "pre-images are not enabled on the collection"
+        except Exception as e:
+            pre_images, no_pre_images = False, f"could not read the collection options: {e}"
+        self._watch_options = {**WATCH_OPTIONS, **PRE_IMAGE_OPTIONS} if pre_images else WATCH_OPTIONS
+        try:
+            # Entering the stream runs the aggregate, which fails fast on standalone servers
+            change_stream = await storage.store.watch(**self._watch_options).__aenter__()
+        except Exception as e:
+            if EVENTS_SOURCE == "change_stream":
+                raise
+            logger.info(f"Change streams unavailable ({e}); publishing task events in-process")
+            return
+        if not pre_images:
+            logger.info(
+                f"Task change events carry no previous state ({no_pre_images}); "
+                "filtered subscribers get a leave event for each update outside their filter"
+            )
+        self.source = "change_stream"
+        self._watcher = asyncio.create_task(self._watch(change_stream))
+
+    async def _watch(self, change_stream) -> None:
+        # Only change-stream deployments need the driver
+        from pymongo.errors import PyMongoError
+
+        resume_token = None
+        while True:
+            try:
+                async for change in change_stream:
+                    resume_token = change_stream.resume_token
+                    event_type = _CHANGE_TYPES.get(change["operationType"])
+                    if event_type is None:
+                        continue
+                    document = change.get("fullDocument")
+                    before = change.get("fullDocumentBeforeChange")
+                    self.publish({
+                        "type": event_type,
+                        "id": str(change["documentKey"]["_id"]),
+                        "task": encode_task(document) if document else None,
+                        "previous": filter_state(before) if before else None,
+                    })
+            except asyncio.CancelledError:
+                await change_stream.close()
+                raise
+            except PyMongoError as e:
+                logger.error(f"Task change stream failed, resuming: {e}")
+                await asyncio.sleep(1)
+            change_stream = storage.store.watch(resume_after=resume_token, **self._watch_options)
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        self.source = "local"
+
+
+broker = EventBroker()
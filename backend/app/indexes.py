@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from . import database
+from .models.task import PRIORITY_RANK, TaskModel
+from .pagination import CURSOR_SORT, SORT_FIELDS, sort_spec
+from .storage.mongo import TEXT_SCORE, TEXT_SCORE_SORT, build_query
+from .sync import DELETION_RETENTION_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry for the tasks collection. Every query shape that
+# TaskModel.get_tasks can generate should be covered by one of these. Each
+# `sort` key has a (field, _id) index; MongoDB walks it backwards for desc.
+TASK_INDEXES: List[IndexModel] = [
+    IndexModel(
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="created_at_id"
+    ),
+    IndexModel(
+        [("status", ASCENDING), ("priority", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="status_priority_created_at"
+    ),
+    IndexModel(
+        [("priority", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="priority_created_at"
+    ),
+    IndexModel(
+        [("due_date", ASCENDING), ("_id", ASCENDING)],
+        name="due_date_id"
+    ),
+    IndexModel(
+        [("priority_rank", ASCENDING), ("_id", ASCENDING)],
+        name="priority_rank_id"
+    ),
+    IndexModel(
+        [("updated_at", ASCENDING), ("_id", ASCENDING)],
+        name="updated_at_id"
+    ),
+    IndexModel(
+        [("overdue", ASCENDING), ("due_date", ASCENDING)],
+        name="overdue_due_date"
+    ),
+    IndexModel(
+        [("title", TEXT), ("description", TEXT)],
+        weights={"title": 10, "description": 1},
+        name="title_description_text"
+    ),
+]
+
+DELETION_INDEXES: List[IndexModel] = [
+    IndexModel(
+        [("deleted_at", ASCENDING)],
+        expireAfterSeconds=DELETION_RETENTION_SECONDS,
+        name="deleted_at_ttl"
+    ),
+]
+
+
+async def backfill_priority_rank(collection=None) -> int:
+    # Tasks written before priority_rank existed; idempotent and cheap once done
+    collection = collection if collection is not None else database.tasks_collection
+    updated = 0
+    for priority, rank in PRIORITY_RANK.items():
+        result = await collection.update_many(
+            {"priority": priority, "priority_rank": {"$exists": False}},
+            {"$set": {"priority_rank": rank}}
+        )
+        updated += result.modified_count
+    if updated:
+        logger.info(f"Backfilled priority_rank on {updated} tasks")
+    return updated
+
+
+async def enable_pre_images(collection=None) -> bool:
+    # Lets change stream events carry the task as it was before an update (MongoDB 6.0+)
+    collection = collection if collection is not None else database.tasks_collection
+    try:
+        await collection.database.command("collMod", collection.name, changeStreamPreAndPostImages={"enabled": True})
+    except Exception as e:
+        logger.info(f"Change stream pre-images not enabled on {collection.name}: {e}")
+        return False
+    return True
+
+
+async def ensure_indexes(collection=None) -> List[str]:
+    collection = collection if collection is not None else database.tasks_collection
+    await backfill_priority_rank(collection)
+    await enable_pre_images(collection)
+    # create_indexes is a no-op for indexes that already exist with the same spec
+    names = await collection.create_indexes(TASK_INDEXES)
+    logger.info(f"Ensured indexes on {collection.name}: {', '.join(names)}")
+    if database.deletions_collection is not None:
+        names += await database.deletions_collection.create_indexes(DELETION_INDEXES)
+    return names
+
+
+def _query_shapes() -> List[dict]:
+    # An unfiltered, unsorted scan is a legitimate COLLSCAN, every other
+    # shape should be served by an index.
+    shapes = []
+    for status in (None, "pending"):
+        for priority in (None, "high"):
+            for search in (None, "report"):
+                query = build_query(TaskModel._filters(status, priority, search))
+                label = ",".join(
+                    name for name, value in (("status", status), ("priority", priority), ("search", search)) if value
+                ) or "all"
+                shapes.append({
+                    "name": f"offset[{label}]",
+                    "filter": query,
+                    "projection": TEXT_SCORE if search else None,
+                    "sort": TEXT_SCORE_SORT if search else None,
+                    "expect_index": bool(query),
+                })
+                shapes.append({
+                    "name": f"cursor[{label}]",
+                    "filter": query,
+                    "projection": None,
+                    "sort": CURSOR_SORT,
+                    "expect_index": True,
+                })
+    for name, query in (
+        ("overdue", build_query(TaskModel._filters(overdue=True))),
+        ("due_soon", build_query(TaskModel._filters(due_soon=True))),
+        ("overdue_sweep", {"overdue": {"$ne": True}, "due_date": {"$lte": datetime.utcnow()}, "status": {"$ne": "completed"}}),
+    ):
+        shapes.append({"name": name, "filter": query, "projection": None, "sort": None, "expect_index": True})
+    for key in SORT_FIELDS:
+        for sort in (key, f"-{key}"):
+            shapes.append({
+                "name": f"sort[{sort}]",
+                "filter": {},
+                "projection": None,
+                "sort": sort_spec(sort),
+                "expect_index": True,
+            })
+    return shapes
+
+
+def _plan_stages(plan: Optional[dict]) -> List[str]:
+    if not plan:
+        return []
+    stages = [plan.get("stage", "")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    if "queryPlan" in plan:
+        stages += _plan_stages(plan["queryPlan"])
+    return stages
+
+
+async def explain_query_shapes(collection=None) -> List[dict]:
+    collection = collection if collection is not None else database.tasks_collection
+    report = []
+    for shape in _query_shapes():
+        cursor = collection.find(shape["filter"], shape["projection"])
+        if shape["sort"]:
+            cursor = cursor.sort(shape["sort"])
+        try:
+            explain = await cursor.explain()
+        except Exception as e:
+            report.append({"name": shape["name"], "error": str(e), "collscan": None, "flagged": True})
+            continue
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan"))
+        collscan = "COLLSCAN" in stages
+        report.append({
+            "name": shape["name"],
+            "stages": stages,
+            "collscan": collscan,
+            "flagged": collscan and shape["expect_index"],
+        })
+    return report
+
+
+async def _main(args: argparse.Namespace) -> int:
+    await database.connect()
+    try:
+        if not args.explain_only:
+            await ensure_indexes()
+        report = await explain_query_shapes()
+    finally:
+        database.close()
+    print(json.dumps(report, indent=2))
+    return 1 if any(item["flagged"] for item in report) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Provision task indexes and check get_tasks query plans")
+    parser.add_argument("--explain-only", action="store_true", help="Skip index creation, only run explain()")
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
@@ -1,8 +1,51 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import logging
+import os
+import time
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import tasks
+from . import IMPORT_STARTED, storage
+from .codec import TaskJSONResponse
+from .events import broker
+from .metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, app_import_seconds, app_startup_seconds, render_latest
+from .ratelimit import AdmissionMiddleware
+from .scheduler import due_scheduler
+from .routes import diagnostics, tasks
 
-app = FastAPI(title="Task Manager API", version="1.0.0")
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ENSURE_INDEXES = os.getenv("ENSURE_INDEXES", "true").lower() in ("1", "true", "yes")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # The storage driver is imported and connected here, not at import time
+    await storage.connect()
+    if ENSURE_INDEXES:
+        try:
+            await storage.store.ensure_indexes()
+        except Exception as e:
+            # Serve traffic anyway: most queries only get slower without their indexes,
+            # but search needs the text index and answers 503 until it exists
+            logger.error(f"Failed to ensure indexes: {e}")
+    await broker.start()
+    await due_scheduler.start()
+    startup_seconds = time.perf_counter() - started
+    app_startup_seconds.set(startup_seconds)
+    logger.info(
+        f"Worker {os.getpid()} ready: imports {IMPORT_SECONDS * 1000:.0f}ms, "
+        f"startup {startup_seconds * 1000:.0f}ms, {storage.store.name} storage"
+    )
+    yield
+    await due_scheduler.stop()
+    await broker.stop()
+    storage.close()
+
+app = FastAPI(title="Task Manager API", version="1.0.0", lifespan=lifespan, default_response_class=TaskJSONResponse)
+
+# Inside CORS, so 429/503 responses still carry CORS headers browsers can read
+app.add_middleware(AdmissionMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -11,10 +54,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
 
+# Outermost, so it times everything including CORS handling
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(tasks.router)
+app.include_router(diagnostics.router)
 
 @app.get("/")
 async def root():
@@ -22,4 +70,14 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+# Everything above, including the routers, middleware and their dependencies
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+app_import_seconds.set(IMPORT_SECONDS)
@@ -0,0 +1,169 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Minimal in-process metrics registry rendered in the Prometheus text format.
+# Each worker process exposes its own series; scrape every worker (or
+# aggregate with the usual Prometheus `sum by`) when running several.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+_registry: List["_Metric"] = []
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+def render_latest() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+http_requests_total = Counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+http_request_duration_seconds = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+http_response_size_bytes = Histogram("http_response_size_bytes", "HTTP response body size", ("method", "route"), buckets=SIZE_BUCKETS)
+taskmodel_operation_seconds = Histogram("taskmodel_operation_seconds", "TaskModel database operation latency", ("method",))
+taskmodel_operation_errors_total = Counter("taskmodel_operation_errors_total", "TaskModel operations that raised", ("method",))
+app_import_seconds = Gauge("app_import_seconds", "Time this worker spent importing the application")
+app_startup_seconds = Gauge("app_startup_seconds", "Time this worker spent in lifespan startup before serving")
+
+
+def timed(method: str):
+    """Record the latency of an async TaskModel method under `method`."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                taskmodel_operation_errors_total.inc(method)
+                raise
+            finally:
+                taskmodel_operation_seconds.observe(time.perf_counter() - start, method)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, in-flight requests, status and response size per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            # The router records the matched route in the scope; use its path
+            # template so /api/tasks/{id} is one series, not one per task
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_requests_total.inc(method, path, str(status))
+            http_request_duration_seconds.observe(time.perf_counter() - start, method, path)
+            http_response_size_bytes.observe(size, method, path)
@@ -1,109 +1,294 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
 from bson.errors import InvalidId
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence
 import logging
-from ..database import tasks_collection
+import os
+from ..cache import TTLValue, task_cache
+from ..codec import TASK_FIELDS, encode_task
+from .. import storage
+from ..events import broker, filter_state
+from ..metrics import timed
+from ..pagination import decode_cursor, encode_cursor, sort_spec
+from ..sync import SYNC_OVERLAP, encode_since
 
 logger = logging.getLogger(__name__)
 
+STATUSES = ("pending", "in-progress", "completed")
+PRIORITIES = ("low", "medium", "high")
+# Stored alongside `priority` so sort=priority can walk an index in rank order
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+DUE_SOON_WINDOW = timedelta(hours=48)
+# Tasks flipped per query by refresh_overdue, so one deadline wave can't produce an unbounded event burst
+OVERDUE_BATCH_SIZE = int(os.getenv("OVERDUE_BATCH_SIZE", "500"))
+
+# Dashboard stats are cached briefly and dropped on every write
+_stats_cache = TTLValue(float(os.getenv("STATS_CACHE_TTL", "5")))
+
+class VersionConflict(Exception):
+    pass
+
 class TaskModel:
     @staticmethod
+    def _now() -> datetime:
+        # BSON dates carry milliseconds; truncate so what we return matches what is stored
+        now = datetime.utcnow()
+        return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+    @staticmethod
+    async def _after_write(events: List[dict]) -> None:
+        # events: {"type": "create"|"update"|"delete", "id": ..., "task": encoded task or None,
+        #          "previous": filter_state of the task before an update, when known}
+        _stats_cache.invalidate()
+        for event in events:
+            if event["type"] != "create":
+                await task_cache.delete(event["id"])
+        # Tombstones let delta sync clients learn about deletions
+        deleted = [ObjectId(event["id"]) for event in events if event["type"] == "delete"]
+        if deleted:
+            await storage.store.record_deletions(deleted, TaskModel._now())
+        # Change counter used for list ETags
+        await storage.store.bump_version()
+        broker.publish_local(events)
+
+    @staticmethod
+    def read_session():
+        return storage.store.read_session()
+
+    @staticmethod
+    @timed("get_version")
+    async def get_version(session=None) -> int:
+        return await storage.store.get_version(session=session)
+
+    @staticmethod
+    def _set_priority_rank(task_data: dict) -> None:
+        if "priority" in task_data:
+            task_data["priority_rank"] = PRIORITY_RANK.get(task_data["priority"])
+
+    @staticmethod
+    def _is_overdue(task: dict, now: datetime) -> bool:
+        due_date = task.get("due_date")
+        return isinstance(due_date, datetime) and due_date <= now and task.get("status") != "completed"
+
+    @staticmethod
+    @timed("create_task")
     async def create_task(task_data: dict) -> dict:
         try:
-            now = datetime.utcnow()
-            
-            # Convert due_date string to datetime for storage if provided
-            if task_data.get("due_date"):
-                try:
-                    # Try to parse as ISO format first
-                    task_data["due_date"] = datetime.fromisoformat(task_data["due_date"].replace('Z', '+00:00'))
-                except ValueError:
-                    # If parsing fails, try to parse as date only (YYYY-MM-DD)
-                    try:
-                        task_data["due_date"] = datetime.strptime(task_data["due_date"], "%Y-%m-%d")
-                    except ValueError:
-                        # If that fails, try to parse as ISO format without timezone
-                        try:
-                            task_data["due_date"] = datetime.fromisoformat(task_data["due_date"])
-                        except ValueError:
-                            raise ValueError("Invalid due_date format. Expected YYYY-MM-DD or ISO format")
-            
-            task_data.update({"created_at": now, "updated_at": now})
-            result = await tasks_collection.insert_one(task_data)
-            task_data["_id"] = str(result.inserted_id)
-            
-            # Convert datetime objects to ISO format strings for response
-            if "created_at" in task_data and isinstance(task_data["created_at"], datetime):
-                task_data["created_at"] = task_data["created_at"].isoformat()
-            if "updated_at" in task_data and isinstance(task_data["updated_at"], datetime):
-                task_data["updated_at"] = task_data["updated_at"].isoformat()
-            if "due_date" in task_data and isinstance(task_data["due_date"], datetime):
-                task_data["due_date"] = task_data["due_date"].isoformat()
+            now = TaskModel._now()
             
-            return task_data
+            TaskModel._set_priority_rank(task_data)
+            task_data.update({"_id": ObjectId(), "overdue": TaskModel._is_overdue(task_data, now), "created_at": now, "updated_at": now})
+            await storage.store.insert(task_data)
+            task = encode_task(task_data)
+            await TaskModel._after_write([{"type": "create", "id": task["_id"], "task": task}])
+            return task
         except Exception as e:
             logger.error(f"Error creating task: {e}")
             raise
 
     @staticmethod
+    def _filters(
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        search: Optional[str] = None,
+        overdue: Optional[bool] = None,
+        due_soon: bool = False
+    ) -> dict:
+        # Storage-neutral filters; see app.storage for what each key means
+        filters = {"status": status, "priority": priority, "overdue": overdue}
+        if due_soon:
+            now = TaskModel._now()
+            filters.update({"due_after": now, "due_before": now + DUE_SOON_WINDOW, "open": True})
+        if search and search.strip():
+            filters["search"] = search.strip()
+        return filters
+
+    @staticmethod
+    @timed("get_tasks")
     async def get_tasks(
         skip: int = 0,
         limit: int = 10,
         status: Optional[str] = None,
         priority: Optional[str] = None,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Sequence[str] = TASK_FIELDS,
+        overdue: Optional[bool] = None,
+        due_soon: bool = False,
+        session=None
     ) -> List[dict]:
-        try:
-            logger.info(f"Fetching tasks with skip={skip}, limit={limit}, status={status}, priority={priority}, search={search}")
-            
-            # Build query based on provided parameters
-            query = {}
-            if status:
-                query["status"] = status
-            if priority:
-                query["priority"] = priority
-            if search and search.strip():
-                query["$or"] = [
-                    {"title": {"$regex": search.strip(), "$options": "i"}},
-                    {"description": {"$regex": search.strip(), "$options": "i"}}
+        # Errors propagate: an empty list would be served as a valid, cacheable result
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fetching tasks with skip=%s, limit=%s, status=%s, priority=%s, search=%s, sort=%s", skip, limit, status, priority, search, sort)
+
+        docs = await storage.store.find(
+            TaskModel._filters(status, priority, search, overdue, due_soon),
+            sort=sort_spec(sort) if sort else None,
+            skip=skip,
+            limit=limit,
+            fields=fields,
+            session=session
+        )
+        return [encode_task(doc, fields) for doc in docs]
+
+    @staticmethod
+    async def iter_tasks(
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        search: Optional[str] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[dict]:
+        async for doc in storage.store.iter(TaskModel._filters(status, priority, search), batch_size):
+            yield encode_task(doc)
+
+    @staticmethod
+    @timed("get_tasks_page")
+    async def get_tasks_page(
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        search: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Sequence[str] = TASK_FIELDS,
+        overdue: Optional[bool] = None,
+        due_soon: bool = False,
+        session=None
+    ) -> dict:
+        order = sort_spec(sort)
+        # Fetch one extra document to know whether another page exists
+        docs = await storage.store.find(
+            TaskModel._filters(status, priority, search, overdue, due_soon),
+            sort=order,
+            limit=limit + 1,
+            fields=fields,
+            after=decode_cursor(cursor, order) if cursor else None,
+            session=session
+        )
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1], order)
+
+        return {
+            "items": [encode_task(doc, fields) for doc in docs],
+            "next_cursor": next_cursor
+        }
+
+    @staticmethod
+    @timed("get_changes")
+    async def get_changes(since: Optional[datetime] = None, after_id: Optional[ObjectId] = None, limit: int = 1000) -> dict:
+        # Issue the next token from before the queries run, minus the overlap
+        next_since = TaskModel._now() - SYNC_OVERLAP
+
+        docs = await storage.store.changes(since, after_id, limit + 1)
+
+        has_more = len(docs) > limit
+        if has_more:
+            docs = docs[:limit]
+            next_token = encode_since(docs[-1]["updated_at"], docs[-1]["_id"])
+        else:
+            next_token = encode_since(next_since)
+
+        deleted = await storage.store.deleted_since(since) if since is not None else []
+
+        return {
+            "upserted": [encode_task(doc) for doc in docs],
+            "deleted": deleted,
+            "next": next_token,
+            "has_more": has_more
+        }
+
+    @staticmethod
+    @timed("get_upcoming_due")
+    async def get_upcoming_due(until: datetime) -> List[dict]:
+        # Open tasks whose deadline falls between now and `until`; a due_date range scan
+        return await storage.store.due_between(TaskModel._now(), until)
+
+    @staticmethod
+    @timed("get_due_dates")
+    async def get_due_dates(task_ids: List[str]) -> List[dict]:
+        return await storage.store.due_dates([ObjectId(task_id) for task_id in task_ids if ObjectId.is_valid(task_id)])
+
+    @staticmethod
+    @timed("refresh_overdue")
+    async def refresh_overdue(task_ids: Optional[List[str]] = None) -> int:
+        """Set `overdue` where a deadline has passed and clear it where it no longer holds.
+
+        Limited to `task_ids` when given, otherwise a sweep of the whole collection.
+        Each batch of flipped tasks is one write, one counter bump and one set of events.
+        """
+        now = TaskModel._now()
+        oids = None
+        if task_ids is not None:
+            oids = [ObjectId(task_id) for task_id in task_ids if ObjectId.is_valid(task_id)]
+        flipped = 0
+        for overdue in (True, False):
+            while True:
+                # Bumping updated_at keeps ETags and delta sync honest about the changed flag
+                found, docs = await storage.store.set_overdue(overdue, now, oids, OVERDUE_BATCH_SIZE)
+                # Only the flag moved, so status and priority are what they were
+                events = [
+                    {"type": "update", "id": str(doc["_id"]), "task": encode_task(doc), "previous": filter_state(doc)}
+                    for doc in docs
                 ]
-            
-            cursor = tasks_collection.find(query).skip(skip).limit(limit)
-            tasks = []
-            async for doc in cursor:
-                # Convert ObjectId to string
-                doc["_id"] = str(doc["_id"])
-                # Convert datetime objects to ISO format strings
-                if "created_at" in doc and isinstance(doc["created_at"], datetime):
-                    doc["created_at"] = doc["created_at"].isoformat()
-                if "updated_at" in doc and isinstance(doc["updated_at"], datetime):
-                    doc["updated_at"] = doc["updated_at"].isoformat()
-                if "due_date" in doc and isinstance(doc["due_date"], datetime):
-                    doc["due_date"] = doc["due_date"].isoformat()
-                tasks.append(doc)
-            
-            return tasks
-            
-        except Exception as e:
-            logger.error(f"Error fetching tasks: {e}")
-            return []
+                if events:
+                    await TaskModel._after_write(events)
+                flipped += len(events)
+                if found < OVERDUE_BATCH_SIZE:
+                    break
+        if flipped:
+            logger.info(f"Overdue flag changed on {flipped} tasks")
+        return flipped
 
     @staticmethod
+    @timed("get_stats")
+    async def get_stats() -> dict:
+        cached = _stats_cache.get()
+        if cached is not None:
+            return cached
+
+        # Taken before counting: a write meanwhile makes set() drop these counts
+        generation = _stats_cache.generation()
+        # The same filters as GET /api/tasks?overdue=true and ?due_soon=true, so the
+        # dashboard counts always match the lists they link to
+        counts = await storage.store.stats({
+            "overdue": TaskModel._filters(overdue=True),
+            "due_soon": TaskModel._filters(due_soon=True),
+        })
+
+        by_status = {status: 0 for status in STATUSES}
+        by_status.update({status: count for status, count in counts["by_status"].items() if status in by_status})
+        by_priority = {priority: 0 for priority in PRIORITIES}
+        by_priority.update({priority: count for priority, count in counts["by_priority"].items() if priority in by_priority})
+        total = counts["total"]
+
+        stats = {
+            "total": total,
+            "by_status": by_status,
+            "by_priority": by_priority,
+            "overdue": counts["overdue"],
+            "due_soon": counts["due_soon"],
+            "completion_rate": (by_status["completed"] / total) * 100 if total else 0.0,
+        }
+        _stats_cache.set(stats, generation)
+        return stats
+
+    @staticmethod
+    @timed("get_task_by_id")
     async def get_task_by_id(task_id: str) -> Optional[dict]:
         try:
-            task = await tasks_collection.find_one({"_id": ObjectId(task_id)})
+            cached = await task_cache.get(task_id)
+            if cached is not None:
+                return cached
+            # Taken before the read: if a write invalidates the key meanwhile,
+            # set() skips what may be the pre-write document
+            generation = task_cache.generation(task_id)
+            task = await storage.store.get(ObjectId(task_id))
             if not task:
                 return None
-            # Convert ObjectId to string
-            task["_id"] = str(task["_id"])
-            # Convert datetime objects to ISO format strings
-            if "created_at" in task and isinstance(task["created_at"], datetime):
-                task["created_at"] = task["created_at"].isoformat()
-            if "updated_at" in task and isinstance(task["updated_at"], datetime):
-                task["updated_at"] = task["updated_at"].isoformat()
-            if "due_date" in task and isinstance(task["due_date"], datetime):
-                task["due_date"] = task["due_date"].isoformat()
+            task = encode_task(task)
+            await task_cache.set(task_id, task, generation)
             return task
         except InvalidId:
             return None
@@ -112,55 +297,139 @@ class TaskModel:
             raise
 
     @staticmethod
-    async def update_task(task_id: str, task_data: dict) -> Optional[dict]:
+    @timed("update_task")
+    async def update_task(task_id: str, task_data: dict, if_updated_at: Optional[List[datetime]] = None) -> Optional[dict]:
+        # if_updated_at makes the update conditional on the stored updated_at
+        # (optimistic concurrency); VersionConflict is raised when it has moved on
         try:
-            # Convert due_date string to datetime for storage if provided
-            if task_data.get("due_date"):
-                try:
-                    # Try to parse as ISO format first
-                    task_data["due_date"] = datetime.fromisoformat(task_data["due_date"].replace('Z', '+00:00'))
-                except ValueError:
-                    # If parsing fails, try to parse as date only (YYYY-MM-DD)
-                    try:
-                        task_data["due_date"] = datetime.strptime(task_data["due_date"], "%Y-%m-%d")
-                    except ValueError:
-                        # If that fails, try to parse as ISO format without timezone
-                        try:
-                            task_data["due_date"] = datetime.fromisoformat(task_data["due_date"])
-                        except ValueError:
-                            raise ValueError("Invalid due_date format. Expected YYYY-MM-DD or ISO format")
-            
-            task_data["updated_at"] = datetime.utcnow()
-            result = await tasks_collection.find_one_and_update(
-                {"_id": ObjectId(task_id)},
-                {"$set": task_data},
-                return_document=True
-            )
-            if not result:
+            TaskModel._set_priority_rank(task_data)
+            now = task_data["updated_at"] = TaskModel._now()
+            oid = ObjectId(task_id)
+            previous = await storage.store.update(oid, task_data, if_updated_at)
+            if not previous:
+                if if_updated_at is not None and await storage.store.existing([oid]):
+                    raise VersionConflict(task_id)
                 return None
-            # Convert ObjectId to string
-            result["_id"] = str(result["_id"])
-            # Convert datetime objects to ISO format strings
-            if "created_at" in result and isinstance(result["created_at"], datetime):
-                result["created_at"] = result["created_at"].isoformat()
-            if "updated_at" in result and isinstance(result["updated_at"], datetime):
-                result["updated_at"] = result["updated_at"].isoformat()
-            if "due_date" in result and isinstance(result["due_date"], datetime):
-                result["due_date"] = result["due_date"].isoformat()
-            return result
+            result = {**previous, **task_data}
+            # A new due date or status can flip the overdue flag; only then is a second write needed
+            overdue = TaskModel._is_overdue(result, now)
+            if result.get("overdue", False) != overdue:
+                await storage.store.set_if_unchanged(oid, now, {"overdue": overdue})
+                result["overdue"] = overdue
+            task = encode_task(result)
+            await TaskModel._after_write([{"type": "update", "id": task_id, "task": task, "previous": filter_state(previous)}])
+            return task
         except InvalidId:
             return None
+        except VersionConflict:
+            raise
         except Exception as e:
             logger.error(f"Error updating task: {e}")
             raise
 
     @staticmethod
+    @timed("delete_task")
     async def delete_task(task_id: str) -> bool:
         try:
-            result = await tasks_collection.delete_one({"_id": ObjectId(task_id)})
-            return result.deleted_count > 0
+            deleted = await storage.store.delete(ObjectId(task_id))
+            if deleted:
+                await TaskModel._after_write([{"type": "delete", "id": task_id, "task": None}])
+            return deleted
         except InvalidId:
             return False
         except Exception as e:
             logger.error(f"Error deleting task: {e}")
-            raise 
\ No newline at end of file
+            raise 
+
+    @staticmethod
+    @timed("bulk_write")
+    async def bulk_write(operations: List[dict], ordered: bool = True) -> dict:
+        """Apply create/update/delete operations in one bulk_write round trip.
+
+        Each operation is {"op": "create"|"update"|"delete", "id": ..., "task": {...}}.
+        Returns one result per operation, in request order. In ordered mode the
+        first failing operation stops everything after it, as in MongoDB.
+        """
+        now = TaskModel._now()
+        results: List[dict] = [{"index": i, "op": op["op"], "id": op.get("id"), "status": "skipped"} for i, op in enumerate(operations)]
+        requests = []
+        request_index: List[int] = []
+        target_ids = {}
+        created_docs = {}
+
+        for i, op in enumerate(operations):
+            try:
+                if op["op"] == "create":
+                    doc = dict(op["task"])
+                    TaskModel._set_priority_rank(doc)
+                    doc.update({"_id": ObjectId(), "overdue": TaskModel._is_overdue(doc, now), "created_at": now, "updated_at": now})
+                    results[i]["id"] = str(doc["_id"])
+                    created_docs[i] = doc
+                    requests.append(("insert", doc))
+                else:
+                    oid = ObjectId(op["id"])
+                    target_ids[i] = oid
+                    if op["op"] == "update":
+                        changes = dict(op["task"])
+                        TaskModel._set_priority_rank(changes)
+                        changes["updated_at"] = now
+                        requests.append(("update", oid, changes))
+                    else:
+                        requests.append(("delete", oid))
+                request_index.append(i)
+            except (InvalidId, TypeError, ValueError) as e:
+                results[i].update({"status": "error", "error": str(e) or "Invalid ID format"})
+                if ordered:
+                    # Nothing after the first invalid operation may run
+                    break
+
+        # One extra round trip tells us which update/delete targets exist,
+        # since bulk writes only report aggregate counts
+        existing = set()
+        if target_ids:
+            existing = await storage.store.existing(list(target_ids.values()))
+
+        failed = {}
+        if requests:
+            executed, errors = await storage.store.bulk_write(requests, ordered=ordered)
+            failed = {request_index[index]: error for index, error in errors.items()}
+            events = []
+            for i in request_index[:executed]:
+                if i in failed:
+                    continue
+                op = operations[i]
+                if op["op"] == "create":
+                    task = encode_task(created_docs[i])
+                    events.append({"type": "create", "id": task["_id"], "task": task})
+                elif target_ids[i] in existing:
+                    # Bulk updates don't return the new document; subscribers refetch by id
+                    events.append({"type": op["op"], "id": str(target_ids[i]), "task": None})
+            await TaskModel._after_write(events)
+            # Nor do they see the stored document, so a new due date or status can't set
+            # `overdue` in the same write; fix the flag up for just those tasks
+            rechecked = [
+                str(target_ids[i]) for i in request_index[:executed]
+                if i not in failed and operations[i]["op"] == "update" and target_ids[i] in existing
+                and ("due_date" in operations[i]["task"] or "status" in operations[i]["task"])
+            ]
+            if rechecked:
+                await TaskModel.refresh_overdue(rechecked)
+        else:
+            executed = 0
+
+        done = {"create": "created", "update": "updated", "delete": "deleted"}
+        for i in request_index[:executed]:
+            if i in failed:
+                results[i].update({"status": "error", "error": failed[i]})
+            elif i in target_ids and target_ids[i] not in existing:
+                results[i]["status"] = "not_found"
+            else:
+                results[i]["status"] = done[operations[i]["op"]]
+
+        logger.info("Bulk write: %d operations, %d sent, %d failed", len(operations), len(requests), len(failed))
+        return {
+            "ordered": ordered,
+            "results": results,
+            "counts": {status: sum(1 for r in results if r["status"] == status) for status in
+                       ("created", "updated", "deleted", "not_found", "error", "skipped")}
+        }
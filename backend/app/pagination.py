@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Public sort keys accepted by GET /api/tasks and the stored field backing each.
+# Priority sorts by its numeric rank so low < medium < high.
+SORT_FIELDS = {
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "due_date": "due_date",
+    "priority": "priority_rank",
+}
+
+DATE_FIELDS = {"created_at", "updated_at", "due_date"}
+
+# Keyset pagination walks the collection in (created_at, _id) order, newest first,
+# unless another sort is requested, so each page is a single index range scan
+# no matter how deep the client goes.
+CURSOR_SORT = [("created_at", -1), ("_id", -1)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def sort_spec(sort: Optional[str]) -> List[Tuple[str, int]]:
+    # "due_date" sorts ascending, "-due_date" descending; _id breaks ties
+    if not sort:
+        return CURSOR_SORT
+    direction = -1 if sort.startswith("-") else 1
+    field = SORT_FIELDS[sort.lstrip("-")]
+    return [(field, direction), ("_id", direction)]
+
+
+def encode_cursor(doc: dict, sort: List[Tuple[str, int]] = CURSOR_SORT) -> str:
+    field = sort[0][0]
+    key = doc.get(field)
+    if isinstance(key, datetime):
+        key = {"$date": key.isoformat()}
+    payload = {"f": field, "k": key, "id": str(doc["_id"])}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_key(field: str, key: Any) -> Any:
+    # The key goes straight into a range query, so it must have the type the
+    # field stores: a naive UTC date, the integer priority rank, or null
+    if key is None:
+        return None
+    if field in DATE_FIELDS:
+        if not isinstance(key, dict) or not isinstance(key.get("$date"), str):
+            raise ValueError(f"cursor key for {field} is not a date")
+        value = datetime.fromisoformat(key["$date"])
+        if value.tzinfo is not None:
+            raise ValueError(f"cursor key for {field} has a UTC offset")
+        return value
+    if not isinstance(key, int) or isinstance(key, bool):
+        raise ValueError(f"cursor key for {field} is not an integer")
+    return key
+
+
+def decode_cursor(cursor: str, sort: List[Tuple[str, int]] = CURSOR_SORT) -> Tuple[Any, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict):
+            raise ValueError("cursor is not an object")
+        # Cursors from before sorting was configurable carry no field
+        if payload.get("f", "created_at") != sort[0][0]:
+            raise ValueError("cursor was issued for a different sort")
+        return _decode_key(sort[0][0], payload["k"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+def keyset_filter(after: Optional[Tuple[Any, ObjectId]], sort: List[Tuple[str, int]] = CURSOR_SORT) -> dict:
+    # `after` is a decoded cursor: the (sort key, _id) of the last document seen
+    if after is None:
+        return {}
+    key, last_id = after
+    field, direction = sort[0]
+    # Documents strictly after the last one seen in (field, _id) order. MongoDB
+    # sorts missing/null values first, and range operators never match null,
+    # so nulls need their own clauses.
+    op = "$gt" if direction == 1 else "$lt"
+    if key is None:
+        clauses = [{field: None, "_id": {op: last_id}}]
+        if direction == 1:
+            clauses.append({field: {"$ne": None}})
+    else:
+        clauses = [{field: {op: key}}, {field: key, "_id": {op: last_id}}]
+        if direction == -1:
+            clauses.append({field: None})
+    return {"$or": clauses}
@@ -0,0 +1,285 @@
+import hashlib
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+from starlette.routing import Match
+from .codec import TaskJSONResponse
+from .metrics import Counter, Gauge
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Token bucket per client: RATE_LIMIT_RATE tokens/second, up to RATE_LIMIT_BURST.
+# Each request spends its route's cost, so a search or export drains the
+# bucket much faster than a get-by-id.
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))
+# Concurrent database-backed requests per worker before shedding with 503 (0 disables)
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT_DB_REQUESTS", "200"))
+LOAD_SHED_RETRY_AFTER = int(os.getenv("LOAD_SHED_RETRY_AFTER", "1"))
+# Only behind a proxy that sets X-Forwarded-For; otherwise clients could pick their own key
+TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+# API keys that get their own bucket; any other X-API-Key is ignored, or a client
+# could dodge its limit by sending a fresh made-up key with every request
+API_KEY_DIGESTS = {
+    hashlib.sha1(key.strip().encode("latin-1")).hexdigest()
+    for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip()
+}
+
+DEFAULT_COST = 1
+SEARCH_COST = 10
+ROUTE_COSTS = {
+    ("GET", "/api/tasks/"): 2,
+    ("GET", "/api/tasks/export"): 20,
+    ("GET", "/api/tasks/changes"): 5,
+    ("GET", "/api/tasks/stats"): 2,
+    ("POST", "/api/tasks/bulk"): 10,
+    ("GET", "/api/diagnostics/indexes"): 20,
+}
+# Never limited or shed
+FREE_ROUTES = {"/", "/health", "/metrics", "/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"}
+# Rate limited, but they hold no database operation while open
+UNMETERED_ROUTES = {"/api/tasks/events", "/api/tasks/test", "/api/tasks/mock"}
+
+requests_rejected_total = Counter("http_requests_rejected_total", "Requests rejected by admission control", ("reason",))
+db_requests_in_flight = Gauge("db_requests_in_flight", "Database-backed requests currently admitted")
+
+
+class RateLimiter:
+    """Token-bucket limiter; acquire() returns 0 when admitted, else seconds until it would be."""
+
+    name = "none"
+
+    def __init__(self, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.allowed = 0
+        self.limited = 0
+
+    async def acquire(self, key: str, cost: float) -> float:
+        self.allowed += 1
+        return 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "rate": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Per-worker buckets, keeping the `maxsize` most recently seen clients."""
+
+    name = "memory"
+
+    def __init__(self, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST, maxsize: int = 10000):
+        super().__init__(rate, burst)
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def acquire(self, key: str, cost: float) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        tokens = self.burst if bucket is None else min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+            self.allowed += 1
+        else:
+            wait = (cost - tokens) / self.rate
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # A forgotten client just starts again with a full bucket
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"clients": len(self._buckets), "maxsize": self.maxsize})
+        return stats
+
+
+# Refill, spend and store in one round trip. Uses the server clock so every
+# worker agrees on elapsed time; returns the wait as a string because Lua
+# numbers are truncated to integers on the way out.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Buckets shared by all workers, on any client exposing redis.asyncio's register_script.
+
+    If the shared store is unreachable requests are admitted rather than failed.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any, rate: float = RATE_LIMIT_RATE, burst: float = RATE_LIMIT_BURST, prefix: str = "ratelimit:"):
+        super().__init__(rate, burst)
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, cost: float) -> float:
+        try:
+            wait = float(await self._script(keys=[self.prefix + key], args=[self.rate, self.burst, cost]))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Rate limiter backend failed, admitting request: {e}")
+            return 0.0
+        if wait > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["errors"] = self.errors
+        return stats
+
+
+class ConcurrencyLimiter:
+    """Caps admitted database-backed requests in this worker; excess is rejected, not queued."""
+
+    def __init__(self, limit: int = MAX_IN_FLIGHT):
+        self.limit = limit
+        self.in_flight = 0
+        self.shed = 0
+
+    def try_acquire(self) -> bool:
+        if self.limit and self.in_flight >= self.limit:
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        db_requests_in_flight.set(self.in_flight)
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        db_requests_in_flight.set(self.in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"limit": self.limit, "in_flight": self.in_flight, "shed": self.shed}
+
+
+def build_rate_limiter() -> RateLimiter:
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend == "redis":
+        return RedisRateLimiter(redis_client())
+    if backend == "memory":
+        return MemoryRateLimiter(maxsize=int(os.getenv("RATE_LIMIT_SIZE", "10000")))
+    return RateLimiter()
+
+
+rate_limiter = build_rate_limiter()
+db_concurrency = ConcurrencyLimiter()
+
+
+def _route_path(scope) -> Optional[str]:
+    # Same first-full-match rule the router applies, done up front so
+    # costs can be looked up by path template before the request runs
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route.path
+    return None
+
+
+def route_cost(method: str, path: Optional[str], query_string: bytes) -> int:
+    if path in FREE_ROUTES:
+        return 0
+    cost = ROUTE_COSTS.get((method, path), DEFAULT_COST)
+    if b"search=" in query_string and any(k == "search" and v.strip() for k, v in parse_qsl(query_string.decode("latin-1"))):
+        cost += SEARCH_COST
+    return cost
+
+
+def client_key(scope) -> str:
+    forwarded = None
+    for name, value in scope["headers"]:
+        if name == b"x-api-key" and value:
+            digest = hashlib.sha1(value).hexdigest()
+            if digest in API_KEY_DIGESTS:
+                return "key:" + digest
+        if name == b"x-forwarded-for":
+            forwarded = value
+    if TRUST_FORWARDED and forwarded:
+        return "ip:" + forwarded.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: per-client rate limiting (429) and load shedding (503)."""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None, concurrency: Optional[ConcurrencyLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.concurrency = concurrency or db_concurrency
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = _route_path(scope)
+        cost = route_cost(scope["method"], path, scope["query_string"])
+        if cost == 0:
+            await self.app(scope, receive, send)
+            return
+
+        # A cost above the burst could never be admitted
+        wait = await self.limiter.acquire(client_key(scope), min(cost, self.limiter.burst))
+        if wait > 0:
+            requests_rejected_total.inc("rate_limited")
+            response = TaskJSONResponse(
+                {"detail": "Rate limit exceeded"}, status_code=429, headers={"Retry-After": str(math.ceil(wait))}
+            )
+            await response(scope, receive, send)
+            return
+
+        if path in UNMETERED_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.concurrency.try_acquire():
+            requests_rejected_total.inc("overloaded")
+            response = TaskJSONResponse(
+                {"detail": "Server is busy, retry shortly"}, status_code=503,
+                headers={"Retry-After": str(LOAD_SHED_RETRY_AFTER)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.concurrency.release()
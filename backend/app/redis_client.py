@@ -0,0 +1,14 @@
+import os
+from typing import Any
+
+_client: Any = None
+
+
+def redis_client() -> Any:
+    """The worker's redis.asyncio client for REDIS_URL, shared by the task cache and the rate limiter."""
+    global _client
+    if _client is None:
+        # Optional dependency, only imported when a Redis-backed component is selected
+        import redis.asyncio as redis
+        _client = redis.from_url(os.environ["REDIS_URL"])
+    return _client
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException
+from .. import storage
+from ..cache import task_cache
+from ..ratelimit import db_concurrency, rate_limiter
+from ..scheduler import due_scheduler
+
+router = APIRouter(prefix="/api/diagnostics", tags=["diagnostics"])
+
+@router.get("/indexes")
+async def check_indexes():
+    if storage.store is None or storage.store.name != "mongo":
+        raise HTTPException(status_code=404, detail="Index diagnostics need the mongo storage backend")
+    from ..indexes import explain_query_shapes
+    report = await explain_query_shapes()
+    return {
+        "flagged": [item["name"] for item in report if item["flagged"]],
+        "shapes": report
+    }
+
+@router.get("/cache")
+async def cache_stats():
+    return task_cache.stats()
+
+@router.get("/pool")
+async def pool_stats():
+    if storage.store is None or storage.store.name != "mongo":
+        raise HTTPException(status_code=404, detail="Pool diagnostics need the mongo storage backend")
+    from .. import database
+    return database.pool_stats.snapshot()
+
+@router.get("/limits")
+async def limit_stats():
+    return {"rate_limit": rate_limiter.stats(), "concurrency": db_concurrency.stats()}
+
+@router.get("/scheduler")
+async def scheduler_stats():
+    return due_scheduler.stats()
@@ -1,7 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query, Path, status
-from typing import List, Optional
-from ..schemas.task import Task, TaskCreate, TaskUpdate
-from ..models.task import TaskModel
+from fastapi import APIRouter, Header, HTTPException, Query, Path, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Union
+from datetime import datetime, timedelta
+import asyncio
+import csv
+import io
+from ..schemas.task import BulkCreate, BulkRequest, BulkResponse, BulkUpdate, Task, TaskChanges, TaskCreate, TaskPage, TaskPartial, TaskPriority, TaskStats, TaskStatus, TaskUpdate
+from ..models.task import TaskModel, VersionConflict
+from ..etags import etag_updated_at, list_etag, none_match, parse_etags, task_etag
+from ..codec import TaskJSONResponse, dumps, parse_fields
+from ..events import broker
+from ..pagination import SORT_FIELDS, InvalidCursor
+from ..storage import SearchUnavailable
+from ..sync import DELETION_RETENTION_SECONDS, InvalidSyncToken, decode_since
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
@@ -26,35 +37,225 @@ async def get_mock_tasks():
 
 @router.post("/", response_model=Task, status_code=status.HTTP_201_CREATED)
 async def create_task(task: TaskCreate):
-    task_dict = task.dict()
+    task_dict = task.model_dump()
     result = await TaskModel.create_task(task_dict)
-    return result
+    return TaskJSONResponse(result, status_code=status.HTTP_201_CREATED, headers={"ETag": task_etag(result)})
 
-@router.get("/", response_model=List[Task])
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_tasks(request: BulkRequest):
+    operations = []
+    for op in request.operations:
+        if isinstance(op, BulkCreate):
+            operations.append({"op": "create", "task": op.task.model_dump()})
+        elif isinstance(op, BulkUpdate):
+            operations.append({"op": "update", "id": op.id, "task": op.task.model_dump(exclude_unset=True)})
+        else:
+            operations.append({"op": "delete", "id": op.id})
+    return await TaskModel.bulk_write(operations, ordered=request.ordered)
+
+SORT_PATTERN = f"^-?({'|'.join(SORT_FIELDS)})$"
+
+@router.get("/", response_model=Union[TaskPage, List[Union[Task, TaskPartial]]])
 async def get_tasks(
+    request: Request,
     skip: int = 0,
     limit: int = 10,
-    status: Optional[str] = Query(None, pattern="^(pending|in-progress|completed)$"),
-    priority: Optional[str] = Query(None, pattern="^(low|medium|high)$"),
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    search: Optional[str] = None,
+    overdue: Optional[bool] = Query(None, description="Only tasks past their due date and not completed (or, with false, the rest)"),
+    due_soon: bool = Query(False, description="Only open tasks due within the next 48 hours"),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description="Sort key, ascending; prefix with `-` for descending"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; `_id` is always included"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor; pass an empty value for the first page"),
+    if_none_match: Optional[str] = Header(None)
+):
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async with TaskModel.read_session() as session:
+        headers = {"Cache-Control": "no-cache"}
+        # due_soon results move with the clock, not only with writes, so they get no ETag
+        if not due_soon:
+            # Read the change counter before querying so a concurrent write can only
+            # make the ETag older than the body, never newer
+            etag = headers["ETag"] = list_etag(await TaskModel.get_version(session=session), str(request.query_params))
+            if none_match(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+
+        # Passing `cursor` (even empty) switches to keyset pagination and a page envelope;
+        # plain skip/limit requests keep returning a bare list.
+        if cursor is not None:
+            if limit < 1:
+                raise HTTPException(status_code=400, detail="limit must be at least 1")
+            try:
+                page = await TaskModel.get_tasks_page(
+                    limit=limit, cursor=cursor, status=status, priority=priority, search=search,
+                    sort=sort, fields=selected, overdue=overdue, due_soon=due_soon, session=session
+                )
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            except SearchUnavailable as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            return TaskJSONResponse(page, headers=headers)
+
+        try:
+            tasks = await TaskModel.get_tasks(
+                skip=skip, limit=limit, status=status, priority=priority, search=search,
+                sort=sort, fields=selected, overdue=overdue, due_soon=due_soon, session=session
+            )
+        except SearchUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return TaskJSONResponse(tasks, headers=headers)
+
+EXPORT_FIELDS = ["_id", "title", "description", "status", "priority", "due_date", "overdue", "created_at", "updated_at"]
+
+async def _export_ndjson(tasks: AsyncIterator[dict], batch_size: int) -> AsyncIterator[bytes]:
+    lines = []
+    async for task in tasks:
+        lines.append(dumps({field: task.get(field) for field in EXPORT_FIELDS}))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+async def _prepend(first: dict, rest: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    yield first
+    async for task in rest:
+        yield task
+
+async def _export_csv(tasks: AsyncIterator[dict], batch_size: int) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    async for task in tasks:
+        writer.writerow(task)
+        rows += 1
+        if rows >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    yield buffer.getvalue()
+
+@router.get("/export")
+async def export_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(500, ge=1, le=10000),
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
     search: Optional[str] = None
 ):
-    tasks = await TaskModel.get_tasks(skip=skip, limit=limit, status=status, priority=priority, search=search)
-    return tasks
+    tasks = TaskModel.iter_tasks(status=status, priority=priority, search=search, batch_size=batch_size)
+    # Run the query before the response starts, so a failure still gets an error status
+    try:
+        tasks = _prepend(await tasks.__anext__(), tasks)
+    except StopAsyncIteration:
+        pass
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(tasks, batch_size),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="tasks.csv"'}
+        )
+    return StreamingResponse(
+        _export_ndjson(tasks, batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="tasks.ndjson"'}
+    )
+
+EVENTS_HEARTBEAT_SECONDS = 15
+
+async def _event_stream(request: Request, status: Optional[str] = None, priority: Optional[str] = None) -> AsyncIterator[bytes]:
+    # Subscribed on first iteration, not in the route: a response that is never
+    # streamed (client gone early) holds no subscription, one that is always unsubscribes
+    subscription = broker.subscribe(status=status, priority=priority)
+    try:
+        # Tell EventSource clients how long to wait before reconnecting
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                # SSE comment; keeps idle connections open through proxies
+                yield b": keep-alive\n\n"
+                continue
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield b"event: resync\ndata: {}\n\n"
+            yield b"id: %d\nevent: %s\ndata: %s\n\n" % (event["seq"], event["type"].encode(), dumps(event))
+    finally:
+        broker.unsubscribe(subscription)
+
+@router.get("/events")
+async def task_events(
+    request: Request,
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None
+):
+    return StreamingResponse(
+        _event_stream(request, status, priority),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/changes", response_model=TaskChanges)
+async def get_changes(
+    since: Optional[str] = Query(None, description="Token from a previous response's `next`; omit for a full sync"),
+    limit: int = Query(1000, ge=1, le=10000)
+):
+    # Apply `upserted` then `deleted`; both are idempotent and may repeat a
+    # few items from the previous sync
+    since_at = after_id = None
+    if since:
+        try:
+            since_at, after_id = decode_since(since)
+        except InvalidSyncToken as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if since_at < datetime.utcnow() - timedelta(seconds=DELETION_RETENTION_SECONDS):
+            raise HTTPException(status_code=410, detail="Sync token expired; do a full sync")
+    changes = await TaskModel.get_changes(since=since_at, after_id=after_id, limit=limit)
+    return TaskJSONResponse(changes)
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats():
+    return await TaskModel.get_stats()
 
 @router.get("/{id}", response_model=Task)
-async def get_task(id: str = Path(...)):
+async def get_task(id: str = Path(...), if_none_match: Optional[str] = Header(None)):
     task = await TaskModel.get_task_by_id(id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    headers = {"ETag": task_etag(task), "Cache-Control": "no-cache"}
+    if none_match(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return TaskJSONResponse(task, headers=headers)
 
 @router.put("/{id}", response_model=Task)
-async def update_task(id: str, task_update: TaskUpdate):
-    task_data = {k: v for k, v in task_update.dict(exclude_unset=True).items()}
-    result = await TaskModel.update_task(id, task_data)
+async def update_task(id: str, task_update: TaskUpdate, if_match: Optional[str] = Header(None)):
+    task_data = {k: v for k, v in task_update.model_dump(exclude_unset=True).items()}
+    # If-Match: * only requires the task to exist, which a plain update already does
+    expected = None
+    tags = parse_etags(if_match)
+    if tags and "*" not in tags:
+        expected = [value for value in map(etag_updated_at, tags) if value is not None]
+        if not expected:
+            raise HTTPException(status_code=412, detail="Task has been modified")
+    try:
+        result = await TaskModel.update_task(id, task_data, if_updated_at=expected)
+    except VersionConflict:
+        raise HTTPException(status_code=412, detail="Task has been modified")
     if not result:
         raise HTTPException(status_code=404, detail="Task not found")
-    return result
+    return TaskJSONResponse(result, headers={"ETag": task_etag(result)})
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(id: str):
@@ -0,0 +1,152 @@
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .events import Subscription, broker
+from .models.task import TaskModel
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("OVERDUE_SCHEDULER", "true").lower() in ("1", "true", "yes")
+# Full reconciliation interval. Between sweeps, deadlines this worker knows about
+# fire on time from the heap; the sweep also catches writes made by other workers.
+SWEEP_SECONDS = float(os.getenv("OVERDUE_SWEEP_SECONDS", "60"))
+
+
+class DueDateScheduler:
+    """Flips the `overdue` flag on tasks as their deadlines pass.
+
+    Keeps a min-heap of (due_date, id) for open tasks due before the next sweep
+    (so memory stays bounded), fed by a range query on due_date at each sweep
+    and incrementally by the task event stream in between.
+    """
+
+    def __init__(self, sweep_seconds: float = SWEEP_SECONDS):
+        self.sweep_seconds = sweep_seconds
+        self._heap: List[Tuple[datetime, str]] = []
+        # id -> due date currently scheduled; heap entries that disagree are stale
+        self._due: Dict[str, datetime] = {}
+        self._horizon = datetime.min
+        self._stale: Set[str] = set()
+        self._subscription: Optional[Subscription] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.sweeps = 0
+        self.fired = 0
+
+    def track(self, task_id: str, due_date: Optional[datetime], status: Optional[str], now: datetime) -> None:
+        # Past deadlines were already flagged by the write; far ones wait for the next sweep
+        if due_date is None or status == "completed" or due_date <= now or due_date > self._horizon:
+            self._due.pop(task_id, None)
+            return
+        if self._due.get(task_id) != due_date:
+            self._due[task_id] = due_date
+            heapq.heappush(self._heap, (due_date, task_id))
+
+    def _observe(self, event: dict, now: datetime) -> None:
+        if event["type"] == "delete":
+            self._due.pop(event["id"], None)
+            return
+        task = event.get("task")
+        if task is None:
+            # Bulk updates don't carry the new document
+            self._stale.add(event["id"])
+            return
+        due_date = task.get("due_date")
+        self.track(event["id"], datetime.fromisoformat(due_date) if due_date else None, task.get("status"), now)
+
+    def _pop_due(self, now: datetime) -> List[str]:
+        fired = []
+        while self._heap and self._heap[0][0] <= now:
+            due_date, task_id = heapq.heappop(self._heap)
+            if self._due.get(task_id) == due_date:
+                del self._due[task_id]
+                fired.append(task_id)
+        return fired
+
+    async def _sweep(self) -> None:
+        await TaskModel.refresh_overdue()
+        now = TaskModel._now()
+        self._horizon = now + timedelta(seconds=self.sweep_seconds * 2)
+        docs = await TaskModel.get_upcoming_due(self._horizon)
+        self._heap = [(doc["due_date"], str(doc["_id"])) for doc in docs]
+        heapq.heapify(self._heap)
+        self._due = {task_id: due_date for due_date, task_id in self._heap}
+        self.sweeps += 1
+
+    async def _refresh_stale(self) -> None:
+        task_ids, self._stale = list(self._stale), set()
+        await TaskModel.refresh_overdue(task_ids)
+        now = TaskModel._now()
+        for doc in await TaskModel.get_due_dates(task_ids):
+            self.track(str(doc["_id"]), doc.get("due_date"), doc.get("status"), now)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_sweep = 0.0
+        while not self._stopping:
+            try:
+                if self._subscription.overflowed:
+                    # Missed events; rebuild from the database
+                    self._subscription.overflowed = False
+                    next_sweep = 0.0
+                if loop.time() >= next_sweep:
+                    await self._sweep()
+                    next_sweep = loop.time() + self.sweep_seconds
+                if self._stale:
+                    await self._refresh_stale()
+                fired = self._pop_due(TaskModel._now())
+                if fired:
+                    self.fired += await TaskModel.refresh_overdue(fired)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Due-date scheduler failed, retrying at the next sweep: {e}")
+                next_sweep = loop.time() + self.sweep_seconds
+
+            timeout = next_sweep - loop.time()
+            if self._heap:
+                timeout = min(timeout, (self._heap[0][0] - TaskModel._now()).total_seconds())
+            try:
+                event = await asyncio.wait_for(self._subscription.queue.get(), timeout=max(0.0, timeout))
+            except asyncio.TimeoutError:
+                continue
+            now = TaskModel._now()
+            self._observe(event, now)
+            while not self._subscription.queue.empty():
+                self._observe(self._subscription.queue.get_nowait(), now)
+
+    async def start(self) -> None:
+        if not SCHEDULER_ENABLED or self._runner is not None:
+            return
+        self._subscription = broker.subscribe()
+        self._stopping = False
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        # wait_for can swallow a cancel that races with a queued event, so also ask the loop to exit
+        self._stopping = True
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        broker.unsubscribe(self._subscription)
+        self._runner = self._subscription = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._runner is not None,
+            "scheduled": len(self._due),
+            "horizon": self._horizon.isoformat() if self._runner is not None else None,
+            "sweeps": self.sweeps,
+            "fired": self.fired,
+            "sweep_seconds": self.sweep_seconds,
+        }
+
+
+due_scheduler = DueDateScheduler()
@@ -1,29 +1,125 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from pydantic import AfterValidator, BaseModel, Field, ConfigDict, field_validator
+from datetime import datetime
+from typing import Dict, List, Literal, Optional, Union
+from typing_extensions import Annotated
+
+TaskStatus = Literal["pending", "in-progress", "completed"]
+TaskPriority = Literal["low", "medium", "high"]
+
+def _normalize_due_date(value: datetime) -> datetime:
+    # Stored as a naive UTC BSON date, which only keeps milliseconds
+    offset = value.utcoffset()
+    if offset is not None:
+        value = value.replace(tzinfo=None) - offset
+    if value.microsecond % 1000:
+        value = value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+# pydantic's datetime parser accepts YYYY-MM-DD and ISO 8601 with or without
+# an offset in a single pass, so requests arrive with a datetime ready to store
+DueDate = Annotated[datetime, AfterValidator(_normalize_due_date)]
 
 class TaskBase(BaseModel):
     title: str
     description: Optional[str] = ""
-    status: str = Field(..., pattern="^(pending|in-progress|completed)$")
-    priority: str = Field(..., pattern="^(low|medium|high)$")
-    due_date: Optional[str] = None
+    status: TaskStatus
+    priority: TaskPriority
+    due_date: Optional[DueDate] = None
 
 class TaskCreate(TaskBase):
     pass
 
 class TaskUpdate(BaseModel):
-    title: Optional[str]
-    description: Optional[str]
-    status: Optional[str] = Field(None, pattern="^(pending|in-progress|completed)$")
-    priority: Optional[str] = Field(None, pattern="^(low|medium|high)$")
-    due_date: Optional[str] = None
+    # Fields left out are unchanged; description and due_date may be cleared with null
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    due_date: Optional[DueDate] = None
+
+    @field_validator("title", "status", "priority")
+    @classmethod
+    def _not_null(cls, value):
+        # Only runs for values actually sent: an explicit null would be stored
+        # as-is and leave a task that fails the Task schema and its filters
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
 
 class Task(TaskBase):
     id: str = Field(alias="_id")
+    # Responses carry ISO 8601 strings as stored-and-encoded by app.codec
+    due_date: Optional[str] = None
+    # Maintained by the server (see app/scheduler.py), never set by clients
+    overdue: bool = False
     created_at: str
     updated_at: str
 
     model_config = ConfigDict(
         populate_by_name=True,
         arbitrary_types_allowed=True
-    ) 
\ No newline at end of file
+    ) 
+class TaskPartial(BaseModel):
+    # GET /api/tasks?fields=... returns only the requested fields (plus _id)
+    id: str = Field(alias="_id")
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    due_date: Optional[str] = None
+    overdue: Optional[bool] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class TaskPage(BaseModel):
+    items: List[Union[Task, TaskPartial]]
+    next_cursor: Optional[str] = None
+
+class TaskChanges(BaseModel):
+    upserted: List[Task]
+    deleted: List[str]
+    next: str
+    has_more: bool
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    overdue: int
+    due_soon: int
+    completion_rate: float
+
+MAX_BULK_OPERATIONS = 10000
+
+class BulkCreate(BaseModel):
+    op: Literal["create"]
+    task: TaskCreate
+
+class BulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    task: TaskUpdate
+
+class BulkDelete(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+BulkOperation = Annotated[Union[BulkCreate, BulkUpdate, BulkDelete], Field(discriminator="op")]
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation] = Field(..., min_length=1, max_length=MAX_BULK_OPERATIONS)
+    ordered: bool = True
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    ordered: bool
+    results: List[BulkItemResult]
+    counts: Dict[str, int]
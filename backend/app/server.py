@@ -0,0 +1,167 @@
+"""Production launcher: python -m app.server
+
+Runs app.main:app in WEB_CONCURRENCY worker processes (default: one per
+available CPU), with uvloop and httptools when installed. SIGTERM stops
+accepting connections and lets in-flight requests finish for up to
+GRACEFUL_TIMEOUT seconds before the lifespan shuts down.
+
+SERVER=gunicorn uses gunicorn's arbiter with uvicorn workers instead (needs
+the gunicorn package). The app is imported once and forked, so workers start
+without re-importing it; the database connects in each worker's lifespan.
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Dict
+
+from . import storage
+
+logger = logging.getLogger("app.server")
+
+APP = "app.main:app"
+
+
+def cpu_count() -> int:
+    # CPUs this process may run on (container limits included), not the host's
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def share_caches(workers: int) -> None:
+    """Keep per-process caches from serving other workers' stale data.
+
+    A write only invalidates the caches of the worker that made it. Workers
+    inherit this environment and read it when app.cache and app.models load.
+    """
+    if os.getenv("TASK_CACHE_BACKEND", "memory").lower() == "memory":
+        logger.warning(
+            f"TASK_CACHE_BACKEND=memory can't see other workers' writes; disabling the task cache "
+            f"for {workers} workers (set TASK_CACHE_BACKEND=redis to share one)"
+        )
+        os.environ["TASK_CACHE_BACKEND"] = "none"
+    if "STATS_CACHE_TTL" not in os.environ:
+        os.environ["STATS_CACHE_TTL"] = "0"
+    elif float(os.environ["STATS_CACHE_TTL"]) > 0:
+        logger.warning(f"Stats are cached per worker and may lag other workers' writes by up to {os.environ['STATS_CACHE_TTL']}s")
+    if os.getenv("RATE_LIMIT_BACKEND", "memory").lower() == "memory":
+        logger.warning(
+            f"RATE_LIMIT_BACKEND=memory keeps buckets per worker; a client may get up to {workers}x "
+            f"RATE_LIMIT_RATE (set RATE_LIMIT_BACKEND=redis to share them)"
+        )
+
+
+def server_options(args: argparse.Namespace) -> Dict:
+    workers = args.workers or cpu_count()
+    if storage.STORAGE_BACKEND == "memory" and workers > 1:
+        # Each worker would hold its own copy of the tasks
+        logger.warning(f"TASK_STORAGE=memory keeps tasks per process; running 1 worker instead of {workers}")
+        workers = 1
+    if workers > 1:
+        share_caches(workers)
+    return {
+        "host": args.host,
+        "port": args.port,
+        "workers": workers,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "graceful_timeout": float(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        "keepalive": int(os.getenv("KEEPALIVE_TIMEOUT", "5")),
+        "access_log": os.getenv("ACCESS_LOG", "false").lower() in ("1", "true", "yes"),
+    }
+
+
+def prepare_indexes(workers: int) -> None:
+    # Create indexes once here instead of in every worker's lifespan
+    if workers < 2 or storage.STORAGE_BACKEND == "memory":
+        return
+    if os.getenv("ENSURE_INDEXES", "true").lower() not in ("1", "true", "yes"):
+        return
+
+    async def ensure() -> None:
+        await storage.connect()
+        try:
+            await storage.store.ensure_indexes()
+        finally:
+            storage.close()
+
+    try:
+        asyncio.run(ensure())
+        os.environ["ENSURE_INDEXES"] = "false"
+    except Exception as e:
+        # Workers will try again in their lifespan
+        logger.error(f"Failed to ensure indexes before starting workers: {e}")
+
+
+def run_uvicorn(options: Dict) -> None:
+    import uvicorn
+
+    uvicorn.run(
+        APP,
+        host=options["host"],
+        port=options["port"],
+        workers=options["workers"],
+        loop=options["loop"],
+        http=options["http"],
+        lifespan="on",
+        timeout_graceful_shutdown=options["graceful_timeout"],
+        timeout_keep_alive=options["keepalive"],
+        access_log=options["access_log"],
+    )
+
+
+def run_gunicorn(options: Dict) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            config = {
+                "bind": f"{options['host']}:{options['port']}",
+                "workers": options["workers"],
+                # UvicornWorker picks uvloop/httptools itself when they are installed
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "graceful_timeout": options["graceful_timeout"],
+                "keepalive": options["keepalive"],
+                "accesslog": "-" if options["access_log"] else None,
+                "preload_app": True,
+            }
+            for key, value in config.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from .main import app
+            return app
+
+    Application().run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Task Manager API with production settings")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")), help="Worker processes (default: CPU count)")
+    parser.add_argument("--server", choices=("uvicorn", "gunicorn"), default=os.getenv("SERVER", "uvicorn"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    options = server_options(args)
+    logger.info(
+        f"Starting {options['workers']} {args.server} worker(s) on {options['host']}:{options['port']} "
+        f"(loop={options['loop']}, http={options['http']}, graceful timeout {options['graceful_timeout']:.0f}s)"
+    )
+    prepare_indexes(options["workers"])
+    if args.server == "gunicorn":
+        run_gunicorn(options)
+    else:
+        run_uvicorn(options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# Task storage backends. TaskModel talks to `store`, which connect() builds
+# from TASK_STORAGE: "mongo" (default, Motor) or "memory" (single process).
+import os
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+from bson import ObjectId
+from ..codec import TASK_FIELDS
+
+STORAGE_BACKEND = os.getenv("TASK_STORAGE", "mongo").lower()
+
+# Filters are plain dicts built by TaskModel._filters:
+#   status / priority: exact match; open: status is not "completed" (ignored when status is set)
+#   search: text query on title/description; overdue: True/False on the stored flag
+#   due_after / due_before: due_after < due_date <= due_before
+Filters = Dict[str, Any]
+# Keyset position: (sort key value, _id) of the last document already returned
+After = Tuple[Any, ObjectId]
+
+
+class SearchUnavailable(Exception):
+    """Raised by find/iter when a search filter can't be served, e.g. the text index is missing."""
+
+
+class TaskStore(ABC):
+    """Storage interface behind TaskModel.
+
+    Documents are dicts as stored: ObjectId `_id`, naive UTC datetimes, plus
+    the derived `priority_rank` and `overdue` fields. Methods may return more
+    fields than `fields` asks for; callers encode with app.codec.
+    """
+
+    name = "none"
+
+    async def connect(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def read_session(self):
+        """Async context manager yielding a session for reads that must agree, or None."""
+        raise NotImplementedError
+
+    async def ensure_indexes(self) -> None:
+        pass
+
+    def watch(self, **kwargs):
+        """Change stream over the tasks, for backends that have one."""
+        raise NotImplementedError(f"{self.name} storage has no change streams")
+
+    async def pre_images_enabled(self) -> bool:
+        """Whether watch() may ask for each task as it was before the change."""
+        return False
+
+    @abstractmethod
+    async def get_version(self, session=None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bump_version(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_many(self, docs: List[dict]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find(
+        self,
+        filters: Filters,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        skip: int = 0,
+        limit: int = 0,
+        fields: Sequence[str] = TASK_FIELDS,
+        after: Optional[After] = None,
+        session=None
+    ) -> List[dict]:
+        """Matching tasks in `sort` order (natural order, or relevance when searching, if None).
+
+        `after` continues a keyset walk in `sort` order; `limit=0` means no limit.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter(self, filters: Filters, batch_size: int = 500) -> AsyncIterator[dict]:
+        """Every matching task in _id order, fetched `batch_size` at a time."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, oid: ObjectId) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update(self, oid: ObjectId, changes: dict, if_updated_at: Optional[List[Any]] = None) -> Optional[dict]:
+        """Apply `changes` ($set) and return the document as it was before, or None if no task matched."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_if_unchanged(self, oid: ObjectId, updated_at: Any, changes: dict) -> None:
+        """Apply `changes` only if the task still has this `updated_at`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, oid: ObjectId) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every task (benchmark reseeding)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def existing(self, oids: List[ObjectId]) -> Set[ObjectId]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_write(self, operations: List[tuple], ordered: bool = True) -> Tuple[int, Dict[int, str]]:
+        """Run ("insert", doc), ("update", oid, changes) and ("delete", oid) operations.
+
+        Returns how many operations ran and {operation index: error} for those that failed.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def stats(self, buckets: Dict[str, Filters]) -> dict:
+        """total, by_status and by_priority counts, plus the number of tasks matching each of `buckets`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def changes(self, since: Optional[Any], after_id: Optional[ObjectId], limit: int) -> List[dict]:
+        """Tasks in (updated_at, _id) order from `since` (exclusive of after_id when given)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def record_deletions(self, oids: List[ObjectId], deleted_at: Any) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def deleted_since(self, since: Any) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def due_between(self, after: Any, until: Any) -> List[dict]:
+        """Open tasks with after < due_date <= until (due_date and status at least)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def due_dates(self, oids: List[ObjectId]) -> List[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_overdue(self, overdue: bool, now: Any, oids: Optional[List[ObjectId]], limit: int) -> Tuple[int, List[dict]]:
+        """Flip up to `limit` tasks whose flag disagrees with their due date and status.
+
+        Returns how many candidates were found and the tasks actually changed,
+        each stamped with updated_at=now.
+        """
+        raise NotImplementedError
+
+
+store: Optional[TaskStore] = None
+
+
+async def connect() -> None:
+    global store
+    if store is not None:
+        return
+    # Imported here so a memory deployment never sets up a MongoDB client
+    if STORAGE_BACKEND == "memory":
+        from .memory import MemoryTaskStore
+        store = MemoryTaskStore()
+    else:
+        from .mongo import MongoTaskStore
+        store = MongoTaskStore()
+    await store.connect()
+
+
+def close() -> None:
+    global store
+    if store is not None:
+        store.close()
+    store = None
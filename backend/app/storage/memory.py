@@ -0,0 +1,398 @@
+import heapq
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from bson import ObjectId
+from ..codec import TASK_FIELDS
+from ..sync import DELETION_RETENTION_SECONDS
+from . import After, Filters, TaskStore
+
+# Same weights as the title_description_text index
+TEXT_WEIGHTS = {"title": 10, "description": 1}
+SORTED_FIELDS = ("created_at", "updated_at", "due_date", "priority_rank")
+_WORD = re.compile(r"\w+")
+_MAX_ID = ObjectId(b"\xff" * 12)
+
+
+def _words(text: Any) -> List[str]:
+    return _WORD.findall(text.lower()) if isinstance(text, str) else []
+
+
+class _SortedIndex:
+    """(value, _id) pairs of one field in MongoDB sort order: missing/null first."""
+
+    def __init__(self, field: str):
+        self.field = field
+        self._entries: List[tuple] = []
+
+    @staticmethod
+    def _key(value: Any, oid: Any) -> tuple:
+        return (value is not None, value, oid)
+
+    def add(self, doc: dict) -> None:
+        insort(self._entries, self._key(doc.get(self.field), doc["_id"]))
+
+    def remove(self, doc: dict) -> None:
+        key = self._key(doc.get(self.field), doc["_id"])
+        i = bisect_left(self._entries, key)
+        if i < len(self._entries) and self._entries[i] == key:
+            del self._entries[i]
+
+    def scan(self, direction: int, after: Optional[After] = None) -> Iterator[ObjectId]:
+        # _ids in (value, _id) order, strictly after `after` when given
+        entries = self._entries
+        if direction == 1:
+            start = 0 if after is None else bisect_right(entries, self._key(*after))
+            for i in range(start, len(entries)):
+                yield entries[i][2]
+        else:
+            end = len(entries) if after is None else bisect_left(entries, self._key(*after))
+            for i in range(end - 1, -1, -1):
+                yield entries[i][2]
+
+    def between(self, low: Any = None, high: Any = None, low_inclusive: bool = False, high_inclusive: bool = True) -> Iterator[ObjectId]:
+        # Non-null values in the range; a None bound is open-ended
+        entries = self._entries
+        if low is None:
+            start = bisect_left(entries, (True,))
+        elif low_inclusive:
+            start = bisect_left(entries, (True, low))
+        else:
+            start = bisect_right(entries, (True, low, _MAX_ID))
+        for i in range(start, len(entries)):
+            value = entries[i][1]
+            if high is not None and (value > high or (value == high and not high_inclusive)):
+                break
+            yield entries[i][2]
+
+
+class MemoryTaskStore(TaskStore):
+    """Tasks in process memory, indexed for every query shape TaskModel issues.
+
+    Status, priority and the overdue flag are hash buckets; created_at,
+    updated_at, due_date and priority_rank are sorted (value, _id) lists;
+    title and description words feed an inverted index for search. Nothing
+    is shared between processes or kept across restarts, so run one worker.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self) -> None:
+        # Empty store, all indexes and tombstones dropped, change counter at 0
+        self._docs: Dict[ObjectId, dict] = {}
+        self._by_status: Dict[Any, Set[ObjectId]] = defaultdict(set)
+        self._by_priority: Dict[Any, Set[ObjectId]] = defaultdict(set)
+        self._overdue: Set[ObjectId] = set()
+        self._sorted = {field: _SortedIndex(field) for field in SORTED_FIELDS}
+        # word -> {_id: weighted occurrences in title and description}
+        self._words: Dict[str, Dict[ObjectId, int]] = defaultdict(dict)
+        self._deleted: Dict[ObjectId, datetime] = {}
+        self._version = 0
+
+    def close(self) -> None:
+        self._reset()
+
+    @asynccontextmanager
+    async def read_session(self):
+        # Reads never interleave with writes inside one event loop
+        yield None
+
+    async def get_version(self, session=None) -> int:
+        return self._version
+
+    async def bump_version(self) -> None:
+        self._version += 1
+
+    def _index(self, doc: dict, fields: Optional[Iterable[str]] = None) -> None:
+        oid = doc["_id"]
+        fields = set(fields) if fields is not None else None
+        if fields is None or "status" in fields:
+            self._by_status[doc.get("status")].add(oid)
+        if fields is None or "priority" in fields:
+            self._by_priority[doc.get("priority")].add(oid)
+        if fields is None or "overdue" in fields:
+            if doc.get("overdue"):
+                self._overdue.add(oid)
+        for field, index in self._sorted.items():
+            if fields is None or field in fields:
+                index.add(doc)
+        if fields is None or not fields.isdisjoint(TEXT_WEIGHTS):
+            counts = Counter()
+            for field, weight in TEXT_WEIGHTS.items():
+                for word in _words(doc.get(field)):
+                    counts[word] += weight
+            for word, count in counts.items():
+                self._words[word][oid] = count
+
+    def _unindex(self, doc: dict, fields: Optional[Iterable[str]] = None) -> None:
+        oid = doc["_id"]
+        fields = set(fields) if fields is not None else None
+        if fields is None or "status" in fields:
+            self._by_status[doc.get("status")].discard(oid)
+        if fields is None or "priority" in fields:
+            self._by_priority[doc.get("priority")].discard(oid)
+        if fields is None or "overdue" in fields:
+            self._overdue.discard(oid)
+        for field, index in self._sorted.items():
+            if fields is None or field in fields:
+                index.remove(doc)
+        if fields is None or not fields.isdisjoint(TEXT_WEIGHTS):
+            for field in TEXT_WEIGHTS:
+                for word in _words(doc.get(field)):
+                    postings = self._words.get(word)
+                    if postings is not None:
+                        postings.pop(oid, None)
+
+    def _set(self, doc: dict, changes: dict) -> None:
+        changed = [field for field, value in changes.items() if doc.get(field, None) != value or field not in doc]
+        if not changed:
+            return
+        self._unindex(doc, changed)
+        doc.update(changes)
+        self._index(doc, changed)
+
+    def _insert(self, doc: dict) -> None:
+        doc = dict(doc)
+        if doc["_id"] in self._docs:
+            raise KeyError(f"E11000 duplicate key error: _id {doc['_id']}")
+        self._docs[doc["_id"]] = doc
+        self._index(doc)
+
+    async def insert(self, doc: dict) -> None:
+        self._insert(doc)
+
+    async def insert_many(self, docs: List[dict]) -> None:
+        for doc in docs:
+            self._insert({"_id": ObjectId(), **doc})
+
+    def _search(self, text: str) -> Dict[ObjectId, float]:
+        # Any word matches, like $text; score weighs title hits over description hits
+        scores: Dict[ObjectId, float] = {}
+        for term in set(_words(text)):
+            for oid, count in self._words.get(term, {}).items():
+                scores[oid] = scores.get(oid, 0) + count
+        return scores
+
+    def _candidates(self, filters: Filters) -> Tuple[Optional[Set[ObjectId]], Optional[Dict[ObjectId, float]]]:
+        # Smallest exact set the hash/text/range indexes give for the filters; None means every task
+        sets = []
+        scores = None
+        if filters.get("status"):
+            sets.append(self._by_status.get(filters["status"], set()))
+        if filters.get("priority"):
+            sets.append(self._by_priority.get(filters["priority"], set()))
+        if filters.get("overdue"):
+            sets.append(self._overdue)
+        if filters.get("search"):
+            scores = self._search(filters["search"])
+            sets.append(scores.keys())
+        if filters.get("due_after") is not None or filters.get("due_before") is not None:
+            sets.append(set(self._sorted["due_date"].between(filters.get("due_after"), filters.get("due_before"))))
+        if not sets:
+            return None, scores
+        sets.sort(key=len)
+        candidates = set(sets[0])
+        for other in sets[1:]:
+            candidates.intersection_update(other)
+        return candidates, scores
+
+    def _matches(self, doc: dict, filters: Filters) -> bool:
+        # Checks the index lookups in _candidates don't already cover
+        if filters.get("open") and not filters.get("status") and doc.get("status") == "completed":
+            return False
+        if filters.get("overdue") is False and doc.get("overdue"):
+            return False
+        return True
+
+    async def find(
+        self,
+        filters: Filters,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        skip: int = 0,
+        limit: int = 0,
+        fields: Sequence[str] = TASK_FIELDS,
+        after: Optional[After] = None,
+        session=None
+    ) -> List[dict]:
+        candidates, scores = self._candidates(filters)
+        wanted = skip + limit if limit else None
+        docs = []
+        if sort:
+            field, direction = sort[0]
+            if candidates is not None and (wanted is None or len(candidates) <= 4 * wanted):
+                # Few enough matches to sort them directly
+                docs = [self._docs[oid] for oid in candidates if self._matches(self._docs[oid], filters)]
+                key = _SortedIndex._key
+                docs.sort(key=lambda doc: key(doc.get(field), doc["_id"]), reverse=direction == -1)
+                if after is not None:
+                    position = key(*after)
+                    if direction == 1:
+                        docs = [doc for doc in docs if key(doc.get(field), doc["_id"]) > position]
+                    else:
+                        docs = [doc for doc in docs if key(doc.get(field), doc["_id"]) < position]
+            else:
+                # Walk the sort index and stop as soon as the page is full
+                for oid in self._sorted[field].scan(direction, after):
+                    if candidates is not None and oid not in candidates:
+                        continue
+                    doc = self._docs[oid]
+                    if self._matches(doc, filters):
+                        docs.append(doc)
+                        if wanted is not None and len(docs) >= wanted:
+                            break
+        elif scores is not None:
+            docs = (self._docs[oid] for oid in candidates if self._matches(self._docs[oid], filters))
+            if wanted is None:
+                docs = sorted(docs, key=lambda doc: scores[doc["_id"]], reverse=True)
+            else:
+                docs = heapq.nlargest(wanted, docs, key=lambda doc: scores[doc["_id"]])
+        else:
+            if candidates is None or wanted is None or len(candidates) > 4 * wanted:
+                # Insertion order, stopping as soon as the page is full
+                source = (doc for oid, doc in self._docs.items() if candidates is None or oid in candidates)
+            else:
+                source = (self._docs[oid] for oid in sorted(candidates))
+            for doc in source:
+                if self._matches(doc, filters):
+                    docs.append(doc)
+                    if wanted is not None and len(docs) >= wanted:
+                        break
+        docs = docs[skip:wanted]
+        return [dict(doc) for doc in docs]
+
+    async def iter(self, filters: Filters, batch_size: int = 500) -> AsyncIterator[dict]:
+        candidates, _ = self._candidates(filters)
+        oids = sorted(candidates if candidates is not None else self._docs)
+        for oid in oids:
+            # The export may span writes; tasks deleted since it started are skipped
+            doc = self._docs.get(oid)
+            if doc is not None and self._matches(doc, filters):
+                yield dict(doc)
+
+    async def get(self, oid: ObjectId) -> Optional[dict]:
+        doc = self._docs.get(oid)
+        return dict(doc) if doc is not None else None
+
+    async def update(self, oid: ObjectId, changes: dict, if_updated_at: Optional[List[Any]] = None) -> Optional[dict]:
+        doc = self._docs.get(oid)
+        if doc is None or (if_updated_at is not None and doc.get("updated_at") not in if_updated_at):
+            return None
+        previous = dict(doc)
+        self._set(doc, changes)
+        return previous
+
+    async def set_if_unchanged(self, oid: ObjectId, updated_at: Any, changes: dict) -> None:
+        doc = self._docs.get(oid)
+        if doc is not None and doc.get("updated_at") == updated_at:
+            self._set(doc, changes)
+
+    def _delete(self, oid: ObjectId) -> bool:
+        doc = self._docs.pop(oid, None)
+        if doc is None:
+            return False
+        self._unindex(doc)
+        return True
+
+    async def delete(self, oid: ObjectId) -> bool:
+        return self._delete(oid)
+
+    async def clear(self) -> None:
+        # Keep the change counter moving so list ETags from before the clear don't match
+        version = self._version
+        self._reset()
+        self._version = version + 1
+
+    async def existing(self, oids: List[ObjectId]) -> Set[ObjectId]:
+        return {oid for oid in oids if oid in self._docs}
+
+    async def bulk_write(self, operations: List[tuple], ordered: bool = True) -> Tuple[int, Dict[int, str]]:
+        failed = {}
+        for i, op in enumerate(operations):
+            try:
+                if op[0] == "insert":
+                    self._insert(op[1])
+                elif op[0] == "update":
+                    doc = self._docs.get(op[1])
+                    if doc is not None:
+                        self._set(doc, op[2])
+                else:
+                    self._delete(op[1])
+            except KeyError as e:
+                failed[i] = e.args[0]
+                if ordered:
+                    return i + 1, failed
+        return len(operations), failed
+
+    def _count(self, filters: Filters) -> int:
+        candidates, _ = self._candidates(filters)
+        oids = candidates if candidates is not None else self._docs
+        return sum(1 for oid in oids if self._matches(self._docs[oid], filters))
+
+    async def stats(self, buckets: Dict[str, Filters]) -> dict:
+        return {
+            "total": len(self._docs),
+            "by_status": {status: len(oids) for status, oids in self._by_status.items() if oids},
+            "by_priority": {priority: len(oids) for priority, oids in self._by_priority.items() if oids},
+            **{name: self._count(filters) for name, filters in buckets.items()},
+        }
+
+    async def changes(self, since: Optional[Any], after_id: Optional[ObjectId], limit: int) -> List[dict]:
+        index = self._sorted["updated_at"]
+        if since is None:
+            oids = index.scan(1)
+        elif after_id is not None:
+            oids = index.scan(1, (since, after_id))
+        else:
+            oids = index.between(since, low_inclusive=True, high=None)
+        docs = []
+        for oid in oids:
+            if len(docs) >= limit:
+                break
+            docs.append(dict(self._docs[oid]))
+        return docs
+
+    async def record_deletions(self, oids: List[ObjectId], deleted_at: Any) -> None:
+        # Expire tombstones here, as the TTL index does for MongoDB
+        cutoff = deleted_at - timedelta(seconds=DELETION_RETENTION_SECONDS)
+        for oid in [oid for oid, when in self._deleted.items() if when < cutoff]:
+            del self._deleted[oid]
+        for oid in oids:
+            self._deleted[oid] = deleted_at
+
+    async def deleted_since(self, since: Any) -> List[str]:
+        return [str(oid) for oid, when in self._deleted.items() if when >= since]
+
+    async def due_between(self, after: Any, until: Any) -> List[dict]:
+        docs = (self._docs[oid] for oid in self._sorted["due_date"].between(after, until))
+        return [{"_id": doc["_id"], "due_date": doc["due_date"], "status": doc.get("status")}
+                for doc in docs if doc.get("status") != "completed"]
+
+    async def due_dates(self, oids: List[ObjectId]) -> List[dict]:
+        docs = (self._docs[oid] for oid in oids if oid in self._docs)
+        return [{"_id": doc["_id"], "due_date": doc.get("due_date"), "status": doc.get("status")} for doc in docs]
+
+    async def set_overdue(self, overdue: bool, now: Any, oids: Optional[List[ObjectId]], limit: int) -> Tuple[int, List[dict]]:
+        if overdue:
+            scope = self._sorted["due_date"].between(high=now) if oids is None else oids
+        else:
+            scope = list(self._overdue) if oids is None else oids
+        found = []
+        for oid in scope:
+            doc = self._docs.get(oid)
+            if doc is None or bool(doc.get("overdue")) == overdue:
+                continue
+            due_date = doc.get("due_date")
+            should_be = isinstance(due_date, datetime) and due_date <= now and doc.get("status") != "completed"
+            if should_be == overdue:
+                found.append(doc)
+                if len(found) >= limit:
+                    break
+        for doc in found:
+            self._set(doc, {"overdue": overdue, "updated_at": now})
+        return len(found), [dict(doc) for doc in found]
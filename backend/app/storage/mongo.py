@@ -0,0 +1,243 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from .. import database
+from ..codec import TASK_FIELDS, TASK_PROJECTION, task_projection
+from ..pagination import keyset_filter
+from . import After, Filters, SearchUnavailable, TaskStore
+
+TEXT_SCORE = {"score": {"$meta": "textScore"}}
+TEXT_SCORE_SORT = [("score", {"$meta": "textScore"})]
+# Server error code for a $text query on a collection without a text index
+INDEX_NOT_FOUND = 27
+
+
+def build_query(filters: Filters) -> dict:
+    query = {}
+    if filters.get("status"):
+        query["status"] = filters["status"]
+    elif filters.get("open"):
+        query["status"] = {"$ne": "completed"}
+    if filters.get("priority"):
+        query["priority"] = filters["priority"]
+    if filters.get("overdue") is not None:
+        # Flag kept current by the due-date scheduler; served by overdue_due_date
+        query["overdue"] = True if filters["overdue"] else {"$ne": True}
+    if filters.get("due_after") is not None or filters.get("due_before") is not None:
+        due = query["due_date"] = {}
+        if filters.get("due_after") is not None:
+            due["$gt"] = filters["due_after"]
+        if filters.get("due_before") is not None:
+            due["$lte"] = filters["due_before"]
+    if filters.get("search"):
+        # Served by the title/description text index (see app/indexes.py)
+        query["$text"] = {"$search": filters["search"]}
+    return query
+
+
+def _raise_if_no_text_index(error: OperationFailure) -> None:
+    # Without the text index every $text query fails; report that rather than a generic error
+    if error.code == INDEX_NOT_FOUND:
+        raise SearchUnavailable("Search is unavailable until the text index is built") from error
+
+
+class MongoTaskStore(TaskStore):
+    """Tasks in MongoDB through the Motor collections set up by app.database."""
+
+    name = "mongo"
+
+    async def connect(self) -> None:
+        await database.connect()
+
+    def close(self) -> None:
+        database.close()
+
+    def read_session(self):
+        return database.read_session()
+
+    async def ensure_indexes(self) -> None:
+        from ..indexes import ensure_indexes
+        await ensure_indexes()
+
+    def watch(self, **kwargs):
+        return database.tasks_collection.watch(**kwargs)
+
+    async def pre_images_enabled(self) -> bool:
+        # Turned on by app.indexes.enable_pre_images, maybe from another process
+        options = await database.tasks_collection.options()
+        return bool(options.get("changeStreamPreAndPostImages", {}).get("enabled"))
+
+    async def get_version(self, session=None) -> int:
+        doc = await database.meta_read_collection.find_one({"_id": "version"}, session=session)
+        return doc["value"] if doc else 0
+
+    async def bump_version(self) -> None:
+        # Collection-wide change counter, shared by all workers
+        await database.meta_collection.update_one({"_id": "version"}, {"$inc": {"value": 1}}, upsert=True)
+
+    async def insert(self, doc: dict) -> None:
+        await database.tasks_collection.insert_one(doc)
+
+    async def insert_many(self, docs: List[dict]) -> None:
+        await database.tasks_collection.insert_many(docs, ordered=False)
+
+    async def find(
+        self,
+        filters: Filters,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        skip: int = 0,
+        limit: int = 0,
+        fields: Sequence[str] = TASK_FIELDS,
+        after: Optional[After] = None,
+        session=None
+    ) -> List[dict]:
+        query = build_query(filters)
+        projection = task_projection(fields)
+        if after is not None:
+            position = keyset_filter(after, sort)
+            query = {"$and": [query, position]} if query else position
+        if sort:
+            # The next cursor is built from the sort key, so fetch it even when not returned
+            cursor = database.tasks_read_collection.find(query, {**projection, sort[0][0]: 1}, session=session).sort(sort)
+        elif "$text" in query:
+            # Rank search results by relevance
+            cursor = database.tasks_read_collection.find(query, {**projection, **TEXT_SCORE}, session=session).sort(TEXT_SCORE_SORT)
+        else:
+            cursor = database.tasks_read_collection.find(query, projection, session=session)
+        try:
+            return await cursor.skip(skip).limit(limit).to_list(length=None)
+        except OperationFailure as e:
+            _raise_if_no_text_index(e)
+            raise
+
+    async def iter(self, filters: Filters, batch_size: int = 500) -> AsyncIterator[dict]:
+        # Streams straight off the Motor cursor so memory stays bounded by batch_size
+        cursor = database.tasks_read_collection.find(build_query(filters), TASK_PROJECTION).sort("_id", 1).batch_size(batch_size)
+        try:
+            async for doc in cursor:
+                yield doc
+        except OperationFailure as e:
+            _raise_if_no_text_index(e)
+            raise
+
+    async def get(self, oid: ObjectId) -> Optional[dict]:
+        return await database.tasks_collection.find_one({"_id": oid}, TASK_PROJECTION)
+
+    async def update(self, oid: ObjectId, changes: dict, if_updated_at: Optional[List[Any]] = None) -> Optional[dict]:
+        query = {"_id": oid}
+        if if_updated_at is not None:
+            query["updated_at"] = {"$in": if_updated_at}
+        return await database.tasks_collection.find_one_and_update(
+            query,
+            {"$set": changes},
+            projection=TASK_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def set_if_unchanged(self, oid: ObjectId, updated_at: Any, changes: dict) -> None:
+        await database.tasks_collection.update_one({"_id": oid, "updated_at": updated_at}, {"$set": changes})
+
+    async def delete(self, oid: ObjectId) -> bool:
+        result = await database.tasks_collection.delete_one({"_id": oid})
+        return result.deleted_count > 0
+
+    async def clear(self) -> None:
+        await database.tasks_collection.delete_many({})
+
+    async def existing(self, oids: List[ObjectId]) -> Set[ObjectId]:
+        cursor = database.tasks_collection.find({"_id": {"$in": oids}}, {"_id": 1})
+        return {doc["_id"] async for doc in cursor}
+
+    async def bulk_write(self, operations: List[tuple], ordered: bool = True) -> Tuple[int, Dict[int, str]]:
+        requests = []
+        for op in operations:
+            if op[0] == "insert":
+                requests.append(InsertOne(op[1]))
+            elif op[0] == "update":
+                requests.append(UpdateOne({"_id": op[1]}, {"$set": op[2]}))
+            else:
+                requests.append(DeleteOne({"_id": op[1]}))
+        failed = {}
+        try:
+            await database.tasks_collection.bulk_write(requests, ordered=ordered)
+            executed = len(requests)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = error.get("errmsg", "Write failed")
+            executed = e.details["writeErrors"][0]["index"] + 1 if ordered and failed else len(requests)
+        return executed, failed
+
+    async def stats(self, buckets: Dict[str, Filters]) -> dict:
+        facets = {
+            "total": [{"$count": "count"}],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_priority": [{"$group": {"_id": "$priority", "count": {"$sum": 1}}}],
+        }
+        for name, filters in buckets.items():
+            facets[name] = [{"$match": build_query(filters)}, {"$count": "count"}]
+        pipeline = [{"$facet": facets}]
+        result = await database.tasks_read_collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+
+        def count(facet: str) -> int:
+            rows = facets.get(facet) or []
+            return rows[0]["count"] if rows else 0
+
+        return {
+            "total": count("total"),
+            "by_status": {row["_id"]: row["count"] for row in facets.get("by_status", [])},
+            "by_priority": {row["_id"]: row["count"] for row in facets.get("by_priority", [])},
+            **{name: count(name) for name in buckets},
+        }
+
+    async def changes(self, since: Optional[Any], after_id: Optional[ObjectId], limit: int) -> List[dict]:
+        query = {}
+        if since is not None:
+            if after_id is not None:
+                # Continuing a page: strictly after the last (updated_at, _id) returned
+                query = {"$or": [
+                    {"updated_at": {"$gt": since}},
+                    {"updated_at": since, "_id": {"$gt": after_id}},
+                ]}
+            else:
+                query = {"updated_at": {"$gte": since}}
+        return await database.tasks_collection.find(query, TASK_PROJECTION).sort(
+            [("updated_at", ASCENDING), ("_id", ASCENDING)]
+        ).limit(limit).to_list(length=limit)
+
+    async def record_deletions(self, oids: List[ObjectId], deleted_at: Any) -> None:
+        await database.deletions_collection.bulk_write(
+            [UpdateOne({"_id": oid}, {"$set": {"deleted_at": deleted_at}}, upsert=True) for oid in oids],
+            ordered=False
+        )
+
+    async def deleted_since(self, since: Any) -> List[str]:
+        cursor = database.deletions_collection.find({"deleted_at": {"$gte": since}}, {"_id": 1})
+        return [str(doc["_id"]) async for doc in cursor]
+
+    async def due_between(self, after: Any, until: Any) -> List[dict]:
+        cursor = database.tasks_collection.find(
+            {"due_date": {"$gt": after, "$lte": until}, "status": {"$ne": "completed"}},
+            {"due_date": 1, "status": 1}
+        )
+        return await cursor.to_list(length=None)
+
+    async def due_dates(self, oids: List[ObjectId]) -> List[dict]:
+        cursor = database.tasks_collection.find({"_id": {"$in": oids}}, {"due_date": 1, "status": 1})
+        return await cursor.to_list(length=None)
+
+    async def set_overdue(self, overdue: bool, now: Any, oids: Optional[List[ObjectId]], limit: int) -> Tuple[int, List[dict]]:
+        query = {"_id": {"$in": oids}} if oids is not None else {}
+        if overdue:
+            query.update({"overdue": {"$ne": True}, "due_date": {"$lte": now}, "status": {"$ne": "completed"}})
+        else:
+            query.update({"overdue": True, "$or": [{"status": "completed"}, {"due_date": {"$not": {"$lte": now}}}]})
+        ids = [doc["_id"] async for doc in database.tasks_collection.find(query, {"_id": 1}).limit(limit)]
+        if not ids:
+            return 0, []
+        await database.tasks_collection.update_many(
+            {**query, "_id": {"$in": ids}}, {"$set": {"overdue": overdue, "updated_at": now}}
+        )
+        cursor = database.tasks_collection.find({"_id": {"$in": ids}, "overdue": overdue, "updated_at": now}, TASK_PROJECTION)
+        return len(ids), await cursor.to_list(length=None)
@@ -0,0 +1,42 @@
+import base64
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# How long deletion tombstones are kept for delta sync; clients that sync less
+# often than this have to do a full resync
+DELETION_RETENTION_SECONDS = int(os.getenv("DELETION_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+# Each sync re-reads this much history so writes that were still in flight
+# (or replicating) when the previous token was issued are not missed.
+# Clients must treat upserts and tombstones as idempotent.
+SYNC_OVERLAP = timedelta(seconds=int(os.getenv("SYNC_OVERLAP_SECONDS", "5")))
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_since(since: datetime, after_id: Optional[ObjectId] = None) -> str:
+    payload = {"t": (since - EPOCH) // timedelta(milliseconds=1)}
+    if after_id is not None:
+        payload["id"] = str(after_id)
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_since(token: str) -> Tuple[datetime, Optional[ObjectId]]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        since = EPOCH + timedelta(milliseconds=int(payload["t"]))
+        after_id = ObjectId(payload["id"]) if "id" in payload else None
+        return since, after_id
+    except (ValueError, KeyError, TypeError, OverflowError, InvalidId) as e:
+        # OverflowError: a timestamp outside the datetime range (or Infinity)
+        raise InvalidSyncToken("Invalid sync token") from e
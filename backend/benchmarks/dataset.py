@@ -0,0 +1,42 @@
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List
+from bson import ObjectId
+
+STATUSES = ("pending", "in-progress", "completed")
+PRIORITIES = ("low", "medium", "high")
+WORDS = (
+    "report", "review", "deploy", "invoice", "meeting", "design", "release", "budget",
+    "customer", "backend", "frontend", "migration", "audit", "roadmap", "hiring", "support",
+)
+
+
+def make_doc(i: int, now: datetime, rng: random.Random) -> dict:
+    created_at = now - timedelta(minutes=i)
+    priority = rng.choice(PRIORITIES)
+    status = rng.choice(STATUSES)
+    due_date = now + timedelta(days=rng.randint(-30, 30))
+    return {
+        "_id": ObjectId(),
+        "title": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {i}",
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))),
+        "status": status,
+        "priority": priority,
+        "priority_rank": PRIORITIES.index(priority),
+        "due_date": due_date,
+        "overdue": due_date <= now and status != "completed",
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def make_docs(n: int, seed: int = 42) -> List[dict]:
+    return [doc for batch in iter_batches(n, 10000, seed) for doc in batch]
+
+
+def iter_batches(n: int, batch_size: int, seed: int = 42) -> Iterator[List[dict]]:
+    # Deterministic synthetic tasks, generated lazily so 1M-task seeds don't sit in memory
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    for start in range(0, n, batch_size):
+        yield [make_doc(i, now, rng) for i in range(start, min(n, start + batch_size))]
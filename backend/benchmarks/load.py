@@ -0,0 +1,270 @@
+"""Load benchmark: drive the FastAPI app in-process against a seeded dataset.
+
+Seeds N synthetic tasks, then runs each scenario (list filters, search,
+cursor pages, get-by-id, stats, writes) through httpx's ASGI transport at the
+requested concurrency and reports p50/p95/p99 latency and throughput.
+
+    # in-memory Mongo stand-in (needs mongomock-motor)
+    python -m benchmarks.load --sizes 10000 --requests 500 --concurrency 16
+
+    # the in-process storage backend (TASK_STORAGE=memory), no MongoDB at all
+    python -m benchmarks.load --storage memory --sizes 10000,100000
+
+    # a real mongod, already running or launched into a temp dir
+    python -m benchmarks.load --mongodb-url mongodb://localhost:27017 --sizes 10000,100000
+    python -m benchmarks.load --launch-mongod --sizes 1000000 --output bench.json
+
+Results are written as JSON (--output) so runs can be compared across commits.
+mongomock does not implement $text, so search scenarios only run against mongod
+or the memory backend.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .dataset import PRIORITIES, STATUSES, WORDS, iter_batches
+
+SEED_BATCH = 10000
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def launch_mongod() -> Iterator[str]:
+    mongod = shutil.which("mongod")
+    if not mongod:
+        raise SystemExit("mongod not found on PATH")
+    dbpath = tempfile.mkdtemp(prefix="taskbench-")
+    port = _free_port()
+    proc = subprocess.Popen(
+        [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        yield f"mongodb://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+def configure_env(mongodb_url: Optional[str], storage: str = "mongo") -> None:
+    # app.database reads its settings at import time, so this runs first
+    os.environ["TASK_STORAGE"] = storage
+    os.environ.setdefault("DATABASE_NAME", "task_benchmark")
+    os.environ.setdefault("COLLECTION_NAME", "tasks")
+    # Every simulated request comes from one client; measure the API, not the limiter
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "none")
+    os.environ.setdefault("MAX_IN_FLIGHT_DB_REQUESTS", "0")
+    if mongodb_url:
+        os.environ["MONGODB_URL"] = mongodb_url
+    else:
+        os.environ["MONGODB_URL"] = "mongodb://mongomock"
+        # mongomock has no replica set or connection pool to tune
+        os.environ["MONGODB_READ_PREFERENCE"] = "primary"
+        os.environ["MONGODB_WARM_CONNECTIONS"] = "0"
+
+
+def scenarios(ids: List[str], rng: random.Random) -> List[Tuple[str, Callable]]:
+    def get(path, params=None):
+        return lambda client: client.get(path, params=params)
+
+    def get_random_task(client):
+        return client.get(f"/api/tasks/{rng.choice(ids)}")
+
+    def create_task(client):
+        return client.post("/api/tasks/", json={
+            "title": f"bench {rng.choice(WORDS)}",
+            "description": "created by benchmark",
+            "status": rng.choice(STATUSES),
+            "priority": rng.choice(PRIORITIES),
+            "due_date": "2030-01-01",
+        })
+
+    def update_task(client):
+        return client.put(f"/api/tasks/{rng.choice(ids)}", json={
+            "title": f"bench {rng.choice(WORDS)}",
+            "description": None,
+            "status": rng.choice(STATUSES),
+        })
+
+    return [
+        ("list", get("/api/tasks/")),
+        ("list?skip=1000", get("/api/tasks/", {"skip": 1000})),
+        ("list?status", get("/api/tasks/", {"status": "pending"})),
+        ("list?priority", get("/api/tasks/", {"priority": "high"})),
+        ("list?status&priority", get("/api/tasks/", {"status": "pending", "priority": "high"})),
+        ("list?search", get("/api/tasks/", {"search": "report"})),
+        ("list?status&search", get("/api/tasks/", {"status": "completed", "search": "budget"})),
+        ("list?cursor", get("/api/tasks/", {"cursor": "", "limit": 50})),
+        ("list?sort=due_date", get("/api/tasks/", {"sort": "due_date"})),
+        ("list?sort=-priority&cursor", get("/api/tasks/", {"sort": "-priority", "cursor": "", "limit": 50})),
+        ("list?overdue", get("/api/tasks/", {"overdue": "true"})),
+        ("list?due_soon", get("/api/tasks/", {"due_soon": "true"})),
+        ("list?fields", get("/api/tasks/", {"fields": "title,status,priority,due_date", "limit": 50})),
+        ("get", get_random_task),
+        ("stats", get("/api/tasks/stats")),
+        ("create", create_task),
+        ("update", update_task),
+    ]
+
+
+async def run_scenario(client, request: Callable, total: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from app import database, storage
+    from app.main import app, lifespan
+
+    if not args.mongodb_url and args.storage == "mongo":
+        from mongomock_motor import AsyncMongoMockClient
+        database.AsyncIOMotorClient = AsyncMongoMockClient
+
+    # Keep per-request application logging out of the measurements
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = {"sizes": {}}
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for size in args.sizes:
+                await storage.store.clear()
+                ids: List[str] = []
+                seed_started = time.perf_counter()
+                for batch in iter_batches(size, SEED_BATCH, seed=args.seed):
+                    await storage.store.insert_many(batch)
+                    ids.extend(str(doc["_id"]) for doc in batch)
+                seed_seconds = time.perf_counter() - seed_started
+                print(f"\n{size} tasks (seeded in {seed_seconds:.1f}s)", file=sys.stderr)
+
+                rng = random.Random(args.seed)
+                size_results = {}
+                for name, request in scenarios(ids, rng):
+                    if args.only and name not in args.only:
+                        continue
+                    if "search" in name and not args.mongodb_url and args.storage == "mongo":
+                        continue
+                    # Warm caches and connection pools before measuring
+                    await run_scenario(client, request, min(args.warmup, args.requests), args.concurrency)
+                    stats = await run_scenario(client, request, args.requests, args.concurrency)
+                    size_results[name] = stats
+                    print(
+                        f"  {name:<22} p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms  "
+                        f"p99 {stats['p99_ms']:8.2f}ms  {stats['throughput_rps']:9.1f} req/s"
+                        + (f"  errors {stats['errors']}" if stats["errors"] else ""),
+                        file=sys.stderr,
+                    )
+                results["sizes"][str(size)] = {"seed_seconds": seed_seconds, "scenarios": size_results}
+            await storage.store.clear()
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000", help="Comma-separated dataset sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--only", default="", help="Comma-separated scenario names to run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--storage", choices=("mongo", "memory"), default="mongo", help="TASK_STORAGE backend to benchmark")
+    parser.add_argument("--mongodb-url", help="Benchmark against this MongoDB instead of mongomock")
+    parser.add_argument("--launch-mongod", action="store_true", help="Start a throwaway mongod for the run")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.only = {name for name in args.only.split(",") if name}
+
+    def execute(mongodb_url: Optional[str]) -> None:
+        args.mongodb_url = mongodb_url
+        configure_env(mongodb_url, args.storage)
+        results = asyncio.run(run(args))
+        report = {
+            "commit": _git_commit(),
+            "backend": "memory" if args.storage == "memory" else "mongod" if mongodb_url else "mongomock",
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            **results,
+        }
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nwrote {args.output}", file=sys.stderr)
+        else:
+            print(json.dumps(report, indent=2))
+
+    if args.launch_mongod:
+        with launch_mongod() as url:
+            execute(url)
+    else:
+        execute(args.mongodb_url)
+
+
+if __name__ == "__main__":
+    main()
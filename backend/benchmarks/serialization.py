@@ -0,0 +1,63 @@
+"""Micro-benchmark: cost of serializing list-endpoint responses per 1k tasks.
+
+"before" replays the original path: per-field isinstance/isoformat conversion,
+FastAPI's response_model validation + JSON-mode dump, then stdlib json.dumps.
+"after" is app.codec.encode_task followed by orjson.
+
+    python -m benchmarks.serialization [--tasks 1000] [--repeat 50]
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+from typing import List
+from pydantic import TypeAdapter
+from app.codec import dumps, encode_task
+from app.schemas.task import Task
+from .dataset import make_docs
+
+def legacy_convert(doc: dict) -> dict:
+    doc["_id"] = str(doc["_id"])
+    if "created_at" in doc and isinstance(doc["created_at"], datetime):
+        doc["created_at"] = doc["created_at"].isoformat()
+    if "updated_at" in doc and isinstance(doc["updated_at"], datetime):
+        doc["updated_at"] = doc["updated_at"].isoformat()
+    if "due_date" in doc and isinstance(doc["due_date"], datetime):
+        doc["due_date"] = doc["due_date"].isoformat()
+    return doc
+
+
+task_list = TypeAdapter(List[Task])
+
+
+def before(docs: List[dict]) -> bytes:
+    tasks = [legacy_convert(dict(doc)) for doc in docs]
+    validated = task_list.validate_python(tasks)
+    content = task_list.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def after(docs: List[dict]) -> bytes:
+    return dumps([encode_task(doc) for doc in docs])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    docs = make_docs(args.tasks)
+    assert json.loads(before(docs)) == json.loads(after(docs))
+
+    per_k = 1000 / args.tasks
+    results = {}
+    for name, fn in (("before", before), ("after", after)):
+        best = min(timeit.repeat(lambda: fn(docs), number=1, repeat=args.repeat))
+        results[name] = best * per_k * 1000
+        print(f"{name:>6}: {results[name]:.3f} ms per 1k tasks")
+    print(f"speedup: {results['before'] / results['after']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Startup benchmark: how long a fresh worker takes to import, start and serve.
+
+Each sample is a new interpreter, as in an autoscaled pod or a spawned worker:
+
+  import     python -X importtime of app.main, grouped by top-level package
+  startup    the app's lifespan (storage connect, indexes, background tasks)
+  first      the first request through the ASGI app, then a warm one
+  process    interpreter launch to the first response
+
+    python -m benchmarks.startup [--repeat 5] [--storage memory,mongo] [--top 15]
+
+The mongo backend runs against mongomock-motor unless --mongodb-url is given.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of timings
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+if sys.argv[1] == "mongomock":
+    from mongomock_motor import AsyncMongoMockClient
+    from app import database
+    database.AsyncIOMotorClient = AsyncMongoMockClient
+import httpx
+
+async def probe():
+    async with app.main.lifespan(app.main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app.main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            await client.get("/api/tasks/")
+            first = time.perf_counter()
+            await client.get("/api/tasks/")
+            warm = time.perf_counter()
+    return {
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (ready - imported) * 1000,
+        "first_request_ms": (first - ready) * 1000,
+        "warm_request_ms": (warm - first) * 1000,
+        "modules": len(sys.modules),
+    }
+
+print(json.dumps(asyncio.run(probe())))
+"""
+
+
+def child_env(storage: str, mongodb_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "TASK_STORAGE": storage,
+        "DATABASE_NAME": env.get("DATABASE_NAME", "task_benchmark"),
+        "COLLECTION_NAME": env.get("COLLECTION_NAME", "tasks"),
+        "MONGODB_URL": mongodb_url or "mongodb://mongomock",
+        "RATE_LIMIT_BACKEND": "none",
+        "OVERDUE_SCHEDULER": "false",
+        "PYTHONPATH": BACKEND_DIR,
+    })
+    if not mongodb_url:
+        env.update({"MONGODB_READ_PREFERENCE": "primary", "MONGODB_WARM_CONNECTIONS": "0"})
+    return env
+
+
+def import_profile(env: Dict[str, str]) -> List[Tuple[str, int, int]]:
+    # (module, self us, cumulative us) for every module app.main pulls in
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def probe(env: Dict[str, str], backend: str) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, backend],
+        env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def summarize(storage: str, args: argparse.Namespace) -> dict:
+    env = child_env(storage, args.mongodb_url)
+    backend = "mongomock" if storage == "mongo" and not args.mongodb_url else storage
+
+    packages: Dict[str, List[int]] = defaultdict(list)
+    modules: Dict[str, List[int]] = defaultdict(list)
+    totals = []
+    for _ in range(args.repeat):
+        profile = import_profile(env)
+        per_package: Dict[str, int] = defaultdict(int)
+        for name, self_us, _ in profile:
+            per_package[name.split(".")[0]] += self_us
+            modules[name].append(self_us)
+        for package, us in per_package.items():
+            packages[package].append(us)
+        totals.append(sum(self_us for _, self_us, _ in profile))
+
+    samples = [probe(env, backend) for _ in range(args.repeat)]
+    timings = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+    return {
+        "backend": backend,
+        "import_total_ms": statistics.median(totals) / 1000,
+        "timings_ms": timings,
+        "packages_ms": dict(sorted(
+            ((package, statistics.median(us) / 1000) for package, us in packages.items()),
+            key=lambda item: item[1], reverse=True,
+        )[:args.top]),
+        "modules_ms": dict(sorted(
+            ((name, statistics.median(us) / 1000) for name, us in modules.items()),
+            key=lambda item: item[1], reverse=True,
+        )[:args.top]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (medians are reported)")
+    parser.add_argument("--storage", default="memory,mongo", help="Comma-separated TASK_STORAGE backends")
+    parser.add_argument("--mongodb-url", help="Measure against this MongoDB instead of mongomock")
+    parser.add_argument("--top", type=int, default=15, help="Packages and modules to list by import time")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for storage in [name for name in args.storage.split(",") if name]:
+        result = report[storage] = summarize(storage, args)
+        timings = result["timings_ms"]
+        print(f"\n{storage} ({result['backend']}), median of {args.repeat}", file=sys.stderr)
+        for key in ("import_ms", "startup_ms", "first_request_ms", "warm_request_ms", "process_ms"):
+            print(f"  {key:<18} {timings[key]:9.1f}", file=sys.stderr)
+        print(f"  {'modules':<18} {timings['modules']:9.0f}", file=sys.stderr)
+        print("  slowest packages (self time):", file=sys.stderr)
+        for package, ms in list(result["packages_ms"].items())[:10]:
+            print(f"    {package:<24} {ms:8.1f}ms", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
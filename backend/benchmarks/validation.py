@@ -0,0 +1,106 @@
+"""Micro-benchmark: create-path validation cost per 1k request bodies.
+
+"before" replays the original path: regex `pattern=` checks on status/priority,
+`due_date` validated as a plain string, the deprecated `.dict()` in the route,
+then the fromisoformat / strptime / fromisoformat cascade in TaskModel. "after"
+is app.schemas.task.TaskCreate, whose Literal and DueDate types produce a
+storable UTC datetime in one pass, dumped with `model_dump()`.
+
+    python -m benchmarks.validation [--tasks 1000] [--repeat 50]
+"""
+import argparse
+import random
+import timeit
+import warnings
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from app.schemas.task import TaskCreate
+from .dataset import PRIORITIES, STATUSES, WORDS
+
+
+class LegacyTaskCreate(BaseModel):
+    title: str
+    description: Optional[str] = ""
+    status: str = Field(..., pattern="^(pending|in-progress|completed)$")
+    priority: str = Field(..., pattern="^(low|medium|high)$")
+    due_date: Optional[str] = None
+
+
+def legacy_parse_due_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError("Invalid due_date format. Expected YYYY-MM-DD or ISO format")
+
+
+def _due_dates(rng: random.Random):
+    # The shapes clients actually send: date inputs, JS toISOString(), offsets, naive ISO, none
+    base = datetime(2030, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 500000))
+    return rng.choice((
+        base.strftime("%Y-%m-%d"),
+        base.strftime("%Y-%m-%dT%H:%M:%S.") + f"{base.microsecond // 1000:03d}Z",
+        base.astimezone(timezone(timedelta(hours=5, minutes=30))).isoformat(),
+        base.replace(tzinfo=None).isoformat(),
+        None,
+    ))
+
+
+def make_bodies(n: int, seed: int = 42) -> List[dict]:
+    rng = random.Random(seed)
+    return [{
+        "title": f"{rng.choice(WORDS).capitalize()} {i}",
+        "description": " ".join(rng.choice(WORDS) for _ in range(10)),
+        "status": rng.choice(STATUSES),
+        "priority": rng.choice(PRIORITIES),
+        "due_date": _due_dates(rng),
+    } for i in range(n)]
+
+
+def before(bodies: List[dict]) -> List[dict]:
+    tasks = []
+    for body in bodies:
+        task = LegacyTaskCreate.model_validate(body).dict()
+        if task.get("due_date"):
+            task["due_date"] = legacy_parse_due_date(task["due_date"])
+        tasks.append(task)
+    return tasks
+
+
+def after(bodies: List[dict]) -> List[dict]:
+    return [TaskCreate.model_validate(body).model_dump() for body in bodies]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    bodies = make_bodies(args.tasks)
+    # The warning is part of what .dict() costs, but don't print a thousand of them
+    warnings.simplefilter("ignore", DeprecationWarning)
+    # Same instants; "after" also normalizes offsets to naive UTC for storage
+    for old, new in zip(before(bodies), after(bodies)):
+        old_due, new_due = old["due_date"], new["due_date"]
+        if old_due is not None and old_due.tzinfo is not None:
+            old_due = old_due.astimezone(timezone.utc).replace(tzinfo=None)
+        assert old_due == new_due, (old["due_date"], new_due)
+
+    per_k = 1000 / args.tasks
+    results = {}
+    for name, fn in (("before", before), ("after", after)):
+        best = min(timeit.repeat(lambda: fn(bodies), number=1, repeat=args.repeat))
+        results[name] = best * per_k * 1000
+        print(f"{name:>6}: {results[name]:.3f} ms per 1k tasks")
+    print(f"speedup: {results['before'] / results['after']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The mongo store runs against mongomock-motor; these only satisfy app.database
+os.environ.setdefault("MONGODB_URL", "mongodb://mongomock")
+os.environ.setdefault("DATABASE_NAME", "task_tests")
+os.environ.setdefault("COLLECTION_NAME", "tasks")
+os.environ.setdefault("MONGODB_READ_PREFERENCE", "primary")
+os.environ.setdefault("MONGODB_WARM_CONNECTIONS", "0")
+
+
+@pytest.fixture
+def on_both_stores(monkeypatch):
+    """Run `check(mongo, memory)` against a MongoTaskStore on mongomock and a fresh MemoryTaskStore."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from app import database
+    from app.storage.memory import MemoryTaskStore
+    from app.storage.mongo import MongoTaskStore
+
+    monkeypatch.setattr(database, "AsyncIOMotorClient", mongomock_motor.AsyncMongoMockClient)
+
+    def run(check):
+        async def main():
+            mongo = MongoTaskStore()
+            await mongo.connect()
+            try:
+                await mongo.clear()
+                await check(mongo, MemoryTaskStore())
+            finally:
+                mongo.close()
+
+        asyncio.run(main())
+
+    return run
@@ -0,0 +1,221 @@
+"""The memory backend must answer every TaskStore call the way MongoDB does.
+
+Each test writes the same documents to both backends and compares results.
+mongomock has no $text, so search is checked against MongoDB's documented
+$text behaviour instead of a live query.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from app.codec import encode_task
+from app.models.task import PRIORITY_RANK
+from app.pagination import decode_cursor, encode_cursor, sort_spec
+from app.storage import SearchUnavailable
+from app.storage.memory import MemoryTaskStore
+from app.storage.mongo import _raise_if_no_text_index, build_query
+
+# Millisecond precision, as BSON stores it
+NOW = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def make_task(title: str, status: str = "pending", priority: str = "medium", due_in_hours=None, description: str = "", **extra) -> dict:
+    created_at = NOW - timedelta(hours=1)
+    return {
+        "_id": ObjectId(),
+        "title": title,
+        "description": description,
+        "status": status,
+        "priority": priority,
+        "priority_rank": PRIORITY_RANK[priority],
+        "due_date": NOW + timedelta(hours=due_in_hours) if due_in_hours is not None else None,
+        "overdue": False,
+        "created_at": created_at,
+        "updated_at": created_at,
+        **extra,
+    }
+
+
+def ids(docs):
+    return [str(doc["_id"]) for doc in docs]
+
+
+async def seed(stores, tasks):
+    for store in stores:
+        for task in tasks:
+            await store.insert(dict(task))
+
+
+async def walk(store, filters, order, page_size):
+    # Follow keyset cursors the way GET /api/tasks?cursor= does
+    seen, after = [], None
+    while True:
+        docs = await store.find(filters, order, limit=page_size, after=after)
+        if not docs:
+            return seen
+        seen += ids(docs)
+        after = decode_cursor(encode_cursor(docs[-1], order), order)
+
+
+def test_keyset_pages_with_null_due_dates(on_both_stores):
+    # Shared due dates and nulls force the _id tie-break and MongoDB's nulls-first order
+    tasks = [make_task(f"t{i}", due_in_hours=[None, -5, 3, 3, None, 10, -5, None][i]) for i in range(8)]
+    tasks.append(make_task("no due_date field"))
+    del tasks[-1]["due_date"]
+
+    async def check(mongo, memory):
+        await seed((mongo, memory), tasks)
+        for sort in ("due_date", "-due_date", "priority", "-created_at"):
+            order = sort_spec(sort)
+            expected = ids(await mongo.find({}, order))
+            assert ids(await memory.find({}, order)) == expected, sort
+            for page_size in (1, 2, 4):
+                assert await walk(mongo, {}, order, page_size) == expected, (sort, page_size)
+                assert await walk(memory, {}, order, page_size) == expected, (sort, page_size)
+        ascending = await memory.find({}, sort_spec("due_date"))
+        assert [doc.get("due_date") for doc in ascending[:4]] == [None] * 4
+
+    on_both_stores(check)
+
+
+def test_filters_match(on_both_stores):
+    tasks = [
+        make_task("a", "pending", "high", due_in_hours=-1, overdue=True),
+        make_task("b", "completed", "high", due_in_hours=-1),
+        make_task("c", "in-progress", "low", due_in_hours=20),
+        make_task("d", "pending", "low", due_in_hours=60),
+        make_task("e", "completed", "medium", due_in_hours=5),
+        make_task("f", "pending", "medium"),
+    ]
+    cases = [
+        {"status": "pending"},
+        {"priority": "high", "status": "completed"},
+        {"overdue": True},
+        {"overdue": False},
+        {"due_after": NOW, "due_before": NOW + timedelta(hours=48), "open": True},
+        {"open": True, "priority": "low"},
+    ]
+
+    async def check(mongo, memory):
+        await seed((mongo, memory), tasks)
+        for filters in cases:
+            expected = ids(await mongo.find(filters, sort_spec("-created_at")))
+            assert ids(await memory.find(filters, sort_spec("-created_at"))) == expected, filters
+            exported = [doc async for doc in memory.iter(filters)]
+            assert ids(exported) == sorted(expected), filters
+        buckets = {"overdue": cases[2], "due_soon": cases[4]}
+        stats = await memory.stats(buckets)
+        assert stats == await mongo.stats(buckets)
+        assert stats["overdue"] == 1 and stats["due_soon"] == 1
+
+    on_both_stores(check)
+
+
+def test_overdue_updates(on_both_stores):
+    tasks = [
+        make_task("past, flag unset", due_in_hours=-2),
+        make_task("past, completed, flag set", "completed", due_in_hours=-2, overdue=True),
+        make_task("future, flag set", due_in_hours=2, overdue=True),
+        make_task("no due date, flag set", overdue=True),
+        make_task("past, flag set", due_in_hours=-2, overdue=True),
+        make_task("due exactly now", due_in_hours=0),
+    ]
+
+    async def check(mongo, memory):
+        await seed((mongo, memory), tasks)
+        for overdue in (True, False):
+            found_mongo, changed_mongo = await mongo.set_overdue(overdue, NOW, None, 100)
+            found_memory, changed_memory = await memory.set_overdue(overdue, NOW, None, 100)
+            assert found_memory == found_mongo
+            assert sorted(ids(changed_memory)) == sorted(ids(changed_mongo)), overdue
+            assert all(doc["overdue"] is overdue and doc["updated_at"] == NOW for doc in changed_memory)
+        # Nothing left to flip, and the flag now agrees with the due dates
+        assert await memory.set_overdue(True, NOW, None, 100) == (0, [])
+        expected = [encode_task(doc) for doc in await mongo.find({}, sort_spec("created_at"))]
+        assert [encode_task(doc) for doc in await memory.find({}, sort_spec("created_at"))] == expected
+        assert [task["overdue"] for task in expected] == [True, False, False, False, True, True]
+
+        # Limited to some ids, and in batches
+        reopened = tasks[1]["_id"]
+        for store in (mongo, memory):
+            await store.update(reopened, {"status": "pending", "updated_at": NOW})
+            assert await store.set_overdue(True, NOW, [tasks[2]["_id"]], 100) == (0, [])
+            found, changed = await store.set_overdue(True, NOW, [reopened], 1)
+            assert found == 1 and ids(changed) == [str(reopened)]
+
+    on_both_stores(check)
+
+
+def test_update_and_delete(on_both_stores):
+    tasks = [make_task(f"t{i}") for i in range(3)]
+    later = NOW + timedelta(minutes=1)
+
+    async def check(mongo, memory):
+        await seed((mongo, memory), tasks)
+        oid = tasks[0]["_id"]
+        for store in (mongo, memory):
+            # update() returns the document as it was before
+            previous = await store.update(oid, {"status": "completed", "updated_at": later})
+            assert previous["status"] == "pending"
+            assert await store.update(oid, {"title": "x"}, if_updated_at=[NOW]) is None
+            await store.set_if_unchanged(oid, later, {"overdue": True})
+            assert (await store.get(oid))["overdue"] is True
+            assert await store.delete(tasks[1]["_id"]) is True
+            assert await store.delete(tasks[1]["_id"]) is False
+        assert encode_task(await memory.get(oid)) == encode_task(await mongo.get(oid))
+        assert await memory.existing([t["_id"] for t in tasks]) == await mongo.existing([t["_id"] for t in tasks])
+        assert ids(await memory.changes(NOW, None, 10)) == ids(await mongo.changes(NOW, None, 10))
+
+    on_both_stores(check)
+
+
+def test_bulk_write_duplicate_id(on_both_stores):
+    task = make_task("dup")
+
+    async def check(mongo, memory):
+        for ordered in (True, False):
+            results = []
+            for store in (mongo, memory):
+                await store.clear()
+                operations = [("insert", dict(task)), ("insert", dict(task)), ("delete", task["_id"])]
+                executed, errors = await store.bulk_write(operations, ordered=ordered)
+                results.append((executed, sorted(errors), await store.existing([task["_id"]])))
+            assert results[0] == results[1], ordered
+
+    on_both_stores(check)
+
+
+def test_text_search():
+    # $text semantics the memory store follows: any term matches, case-insensitively,
+    # and title hits outweigh description hits 10:1 (the text index weights)
+    memory = MemoryTaskStore()
+    tasks = [
+        make_task("Groceries", description="buy milk; the REPORT can wait, the report is late"),
+        make_task("Quarterly report", description="numbers"),
+        make_task("Budget", description="quarterly numbers"),
+        make_task("Unrelated"),
+    ]
+
+    async def check():
+        for task in tasks:
+            await memory.insert(dict(task))
+        # One title hit beats two description hits
+        found = await memory.find({"search": "report"})
+        assert ids(found) == ids([tasks[1], tasks[0]])
+        found = await memory.find({"search": "QUARTERLY budget"})
+        assert ids(found) == ids([tasks[2], tasks[1]])
+        assert await memory.find({"search": "nothing-matches"}) == []
+        assert ids(await memory.find({"search": "report", "priority": "medium"}, limit=1)) == ids([tasks[1]])
+
+    asyncio.run(check())
+
+
+def test_missing_text_index():
+    assert build_query({"search": "report"}) == {"$text": {"$search": "report"}}
+    with pytest.raises(SearchUnavailable):
+        _raise_if_no_text_index(OperationFailure("text index required for $text query", code=27))
+    # Any other failure is left for the caller to re-raise
+    _raise_if_no_text_index(OperationFailure("interrupted", code=11601))
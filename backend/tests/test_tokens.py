@@ -0,0 +1,64 @@
+"""Client-supplied cursors, sync tokens and ETags: malformed ones are rejected, never a 500."""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.etags import etag_updated_at
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor, sort_spec
+from app.sync import InvalidSyncToken, decode_since, encode_since
+
+
+def encode(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, doc", [
+    (None, {"created_at": datetime(2024, 1, 1, 12, 30, 0, 125000)}),
+    ("priority", {"priority_rank": 2}),
+    ("due_date", {"due_date": None}),
+])
+def test_cursor_round_trip(sort, doc):
+    doc["_id"] = ObjectId()
+    order = sort_spec(sort)
+    assert decode_cursor(encode_cursor(doc, order), order) == (doc[order[0][0]], doc["_id"])
+
+
+@pytest.mark.parametrize("sort, payload", [
+    (None, [1]),
+    (None, 1),
+    ("priority", {"f": "priority_rank", "k": [1, 2]}),
+    ("priority", {"f": "priority_rank", "k": "1"}),
+    ("priority", {"f": "priority_rank", "k": True}),
+    ("due_date", {"f": "due_date", "k": 5}),
+    ("due_date", {"f": "due_date", "k": {"$date": 5}}),
+    ("due_date", {"f": "due_date", "k": {"$date": "2024-01-01T00:00:00+02:00"}}),
+    ("due_date", {"f": "created_at", "k": None}),
+])
+def test_invalid_cursor(sort, payload):
+    if isinstance(payload, dict):
+        payload["id"] = str(ObjectId())
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode(payload), sort_spec(sort))
+
+
+@pytest.mark.parametrize("payload", [{"t": 1e20}, {"t": -1e20}, {"t": float("inf")}, {"t": 1, "id": 5}, [1], "t"])
+def test_invalid_sync_token(payload):
+    with pytest.raises(InvalidSyncToken):
+        decode_since(encode(payload))
+
+
+def test_sync_token_round_trip():
+    since, after_id = datetime(2024, 1, 1, 0, 0, 0, 5000), ObjectId()
+    assert decode_since(encode_since(since, after_id)) == (since, after_id)
+
+
+@pytest.mark.parametrize("etag", ['"99999999999999999999999"', '"-99999999999999999999999"', '"abc"', 'W/"1"'])
+def test_foreign_etag(etag):
+    assert etag_updated_at(etag) is None
+
+
+def test_etag_round_trip():
+    assert etag_updated_at('"1704067200005"') == datetime(2024, 1, 1, 0, 0, 0, 5000)
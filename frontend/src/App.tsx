@@ -6,9 +6,13 @@ import { Tasks } from './components/pages/Tasks';
 import { AddTask } from './components/pages/AddTask';
 import { EditTask } from './components/pages/EditTask';
 import { Navigation } from './components/Navigation';
-import type { Task, TaskFormData, TaskAPIResponse } from './types/task';
+import type { Task, TaskFormData, TaskAPIResponse, TaskStatsAPIResponse, TaskChangeEvent } from './types/task';
 
 const API_BASE_URL = 'http://127.0.0.1:8000/api';
+// Live-update pacing, see the change feed effect in AppContent
+const STATS_REFRESH_MS = 1000;
+const REFETCH_SETTLE_MS = 100;
+const MAX_SEPARATE_REFETCHES = 5;
 
 // Helper function to convert API response to frontend format
 const convertApiResponseToTask = (apiTask: TaskAPIResponse): Task => ({
@@ -26,13 +30,28 @@ const AppContent: React.FC = () => {
   const navigate = useNavigate();
   const location = useLocation();
   const [tasks, setTasks] = useState<Task[]>([]);
+  const [stats, setStats] = useState<TaskStatsAPIResponse | null>(null);
   const [loading, setLoading] = useState(false);
 
+  // Fetch aggregate stats for the dashboard
+  const fetchStats = async () => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/tasks/stats`);
+      if (!response.ok) {
+        throw new Error('Failed to fetch stats');
+      }
+      const data: TaskStatsAPIResponse = await response.json();
+      setStats(data);
+    } catch (error) {
+      console.error('Error fetching stats:', error);
+    }
+  };
+
   // Fetch tasks from API
   const fetchTasks = async () => {
     setLoading(true);
     try {
-      const response = await fetch(`${API_BASE_URL}/tasks`);
+      const response = await fetch(`${API_BASE_URL}/tasks/`);
       if (!response.ok) {
         throw new Error('Failed to fetch tasks');
       }
@@ -50,6 +69,84 @@ const AppContent: React.FC = () => {
   // Load tasks on component mount
   useEffect(() => {
     fetchTasks();
+    fetchStats();
+  }, []);
+
+  // Apply changes pushed by the server instead of re-fetching the whole list
+  useEffect(() => {
+    const upsertTask = (task: Task) => {
+      setTasks(prevTasks =>
+        prevTasks.some(t => t.id === task.id)
+          ? prevTasks.map(t => (t.id === task.id ? task : t))
+          : [task, ...prevTasks]
+      );
+    };
+
+    const fetchTask = async (id: string) => {
+      const response = await fetch(`${API_BASE_URL}/tasks/${id}`);
+      if (response.ok) {
+        upsertTask(convertApiResponseToTask(await response.json()));
+      }
+    };
+
+    // Bursts of events (bulk writes, deadline sweeps) are coalesced: stats are
+    // refreshed at most once per STATS_REFRESH_MS, and tasks sent without a body
+    // are refetched together once the burst settles
+    let statsTimer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleStats = () => {
+      if (statsTimer === undefined) {
+        statsTimer = setTimeout(() => {
+          statsTimer = undefined;
+          fetchStats();
+        }, STATS_REFRESH_MS);
+      }
+    };
+
+    const staleIds = new Set<string>();
+    let refetchTimer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleRefetch = (id: string) => {
+      staleIds.add(id);
+      clearTimeout(refetchTimer);
+      refetchTimer = setTimeout(() => {
+        const ids = [...staleIds];
+        staleIds.clear();
+        if (ids.length > MAX_SEPARATE_REFETCHES) {
+          fetchTasks();
+        } else {
+          ids.forEach(fetchTask);
+        }
+      }, REFETCH_SETTLE_MS);
+    };
+
+    const handleChange = (event: MessageEvent) => {
+      const change: TaskChangeEvent = JSON.parse(event.data);
+      if (change.type === 'delete' || change.type === 'leave') {
+        staleIds.delete(change.id);
+        setTasks(prevTasks => prevTasks.filter(task => task.id !== change.id));
+      } else if (change.task) {
+        upsertTask(convertApiResponseToTask(change.task));
+      } else {
+        scheduleRefetch(change.id);
+      }
+      scheduleStats();
+    };
+
+    const source = new EventSource(`${API_BASE_URL}/tasks/events`);
+    source.addEventListener('create', handleChange);
+    source.addEventListener('update', handleChange);
+    source.addEventListener('delete', handleChange);
+    source.addEventListener('leave', handleChange);
+    // The server dropped events for us; start over from a fresh list
+    source.addEventListener('resync', () => {
+      staleIds.clear();
+      fetchTasks();
+      fetchStats();
+    });
+    return () => {
+      source.close();
+      clearTimeout(statsTimer);
+      clearTimeout(refetchTimer);
+    };
   }, []);
 
   const handleNavigate = (path: string) => {
@@ -59,7 +156,7 @@ const AppContent: React.FC = () => {
   const handleCreateTask = async (data: TaskFormData) => {
     setLoading(true);
     try {
-      const response = await fetch(`${API_BASE_URL}/tasks`, {
+      const response = await fetch(`${API_BASE_URL}/tasks/`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -80,6 +177,7 @@ const AppContent: React.FC = () => {
       const newTaskApi: TaskAPIResponse = await response.json();
       const newTask = convertApiResponseToTask(newTaskApi);
       setTasks(prevTasks => [newTask, ...prevTasks]);
+      fetchStats();
       toast.success('Task created successfully!');
       navigate('/tasks');
     } catch (error) {
@@ -118,6 +216,7 @@ const AppContent: React.FC = () => {
           task.id === id ? updatedTask : task
         )
       );
+      fetchStats();
       toast.success('Task updated successfully!');
       navigate('/tasks');
     } catch (error) {
@@ -140,6 +239,7 @@ const AppContent: React.FC = () => {
       }
 
       setTasks(prevTasks => prevTasks.filter(task => task.id !== id));
+      fetchStats();
       toast.success('Task deleted successfully!');
     } catch (error) {
       console.error('Error deleting task:', error);
@@ -157,11 +257,11 @@ const AppContent: React.FC = () => {
         <Routes>
           <Route 
             path="/" 
-            element={<Dashboard tasks={tasks} onNavigate={handleNavigate} />} 
+            element={<Dashboard tasks={tasks} stats={stats} onNavigate={handleNavigate} />} 
           />
           <Route 
             path="/dashboard" 
-            element={<Dashboard tasks={tasks} onNavigate={handleNavigate} />} 
+            element={<Dashboard tasks={tasks} stats={stats} onNavigate={handleNavigate} />} 
           />
           <Route 
             path="/tasks" 
@@ -5,24 +5,25 @@ import { Button } from '../ui/button';
 import { Badge } from '../ui/badge';
 import { Progress } from '../ui/progress';
 import { Plus, TrendingUp, Clock, CheckCircle, AlertCircle } from 'lucide-react';
-import type { Task } from '../../types/task';
+import type { Task, TaskStatsAPIResponse } from '../../types/task';
 
 interface DashboardProps {
   tasks: Task[];
+  stats: TaskStatsAPIResponse | null;
   onNavigate: (path: string) => void;
 }
 
-export const Dashboard: React.FC<DashboardProps> = ({ tasks, onNavigate }) => {
-  const stats = React.useMemo(() => {
-    const total = tasks.length;
-    const pending = tasks.filter(t => t.status === 'pending').length;
-    const inProgress = tasks.filter(t => t.status === 'in-progress').length;
-    const completed = tasks.filter(t => t.status === 'completed').length;
-    const highPriority = tasks.filter(t => t.priority === 'high').length;
-    const completionRate = total > 0 ? (completed / total) * 100 : 0;
-    
-    return { total, pending, inProgress, completed, highPriority, completionRate };
-  }, [tasks]);
+export const Dashboard: React.FC<DashboardProps> = ({ tasks, stats: apiStats, onNavigate }) => {
+  // Counts come from the server-side aggregation so they cover every task,
+  // not just the page the client happens to have loaded
+  const stats = React.useMemo(() => ({
+    total: apiStats?.total ?? 0,
+    pending: apiStats?.by_status.pending ?? 0,
+    inProgress: apiStats?.by_status['in-progress'] ?? 0,
+    completed: apiStats?.by_status.completed ?? 0,
+    highPriority: apiStats?.by_priority.high ?? 0,
+    completionRate: apiStats?.completion_rate ?? 0,
+  }), [apiStats]);
   
 
   const recentTasks = React.useMemo(() => {
@@ -32,6 +32,26 @@ export interface TaskAPIResponse {
   status: 'pending' | 'in-progress' | 'completed';
   priority: 'low' | 'medium' | 'high';
   due_date: string | null;
+  overdue: boolean;
   created_at: string;
   updated_at: string;
-}
\ No newline at end of file
+}
+// Backend aggregate stats (GET /api/tasks/stats)
+export interface TaskStatsAPIResponse {
+  total: number;
+  by_status: Record<'pending' | 'in-progress' | 'completed', number>;
+  by_priority: Record<'low' | 'medium' | 'high', number>;
+  overdue: number;
+  due_soon: number;
+  completion_rate: number;
+}
+
+// Change feed event (GET /api/tasks/events)
+export interface TaskChangeEvent {
+  seq: number;
+  type: 'create' | 'update' | 'delete' | 'leave';
+  id: string;
+  task: TaskAPIResponse | null;
+  // Status and priority before an update, when the server knows them
+  previous?: Pick<TaskAPIResponse, 'status' | 'priority'> | null;
+}